@@ -0,0 +1,44 @@
+import argparse
+
+from blackjack import benchmark
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description='Benchmark the hot paths of the game')
+    parser.add_argument('-o', '--output', default=None,
+                        help='save the results in this JSON file')
+    parser.add_argument('--scale', type=float, default=1.0,
+                        help='multiply the work done by each benchmark')
+    parser.add_argument('--repeat', type=int, default=3,
+                        help='keep the best of this many runs')
+    parser.add_argument('-s', '--seats', type=int, default=4,
+                        help='time full rounds at 1 up to this many seats')
+    parser.add_argument('-k', '--select', default=None,
+                        help='only the benchmarks with this in their name')
+    parser.add_argument('--compare', nargs=2, metavar=('BEFORE', 'AFTER'),
+                        default=None,
+                        help='compare two saved results instead')
+    parser.add_argument('--threshold', type=float, default=0.1,
+                        help='slowdown flagged as a regression (0.1 - 10%%)')
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    if args.compare is not None:
+        rows = benchmark.compare(benchmark.load(args.compare[0]),
+                                 benchmark.load(args.compare[1]),
+                                 args.threshold)
+        print(benchmark.format_comparison(rows))
+        return 1 if any(regressed for *row, regressed in rows) else 0
+
+    results = benchmark.run(args.scale, args.repeat, args.seats, args.select)
+    print(benchmark.format_results(results))
+    if args.output is not None:
+        benchmark.save(results, args.output)
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
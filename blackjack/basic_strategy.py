@@ -0,0 +1,239 @@
+"""
+Basic strategy
+
+Exact expected values of (h)it and (s)tand for every hand against every
+dealer card, computed once by dynamic programming and kept in a cache file.
+The rules are the ones of this game:
+    - the dealer has only one card when the players decide, and hits as
+      long as the sum of the cards is 17 or less
+    - every win is paid 1:1 (21 included), a draw gives the bet back
+    - at most one ace counts 11, and only if the other cards, without the
+      aces, leave room for it (A, A, 10 is 22)
+
+Because of the aces rule a hand isn't described by its sum alone (A, A, A, 7
+and A, 9 are both 20 but don't take a 3 the same way), so the tables are
+indexed by (sum of the cards other than the aces, number of aces, dealer
+card). The cards are drawn from an infinite shoe: each rank 1/13, the
+tens, jacks, queens and kings 4/13 together
+"""
+import os
+import array
+import pickle
+import logging
+
+from blackjack.deck import Deck
+
+log = logging.getLogger("basic_strategy")
+
+# in the `assets` of the project, wherever it's run from
+cwd = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+CACHE_FILE = os.path.join(cwd, 'assets', 'basic_strategy.cache')
+CACHE_VERSION = 1
+# the rules the tables are computed for - part of the cache signature
+DEALER_STANDS_OVER = 17
+PAYOUT = 1
+
+# probability of each card value (the aces are 1)
+CARD_PROBABILITIES = {value: Deck.card_values.count(value) /
+                      len(Deck.card_values)
+                      for value in set(Deck.card_values)}
+# dealer's cards (1 - ace)
+UPCARDS = range(1, 11)
+BUST = 22
+# sizes of the tables: sum without aces 0..21, aces 0..21
+MAX_NON_ACES = 22
+MAX_ACES = 22
+
+
+def hand_total(non_aces, aces):
+    """
+    Return: the sum of a hand, the same as `IPlayer` counts it
+    """
+    if aces > 0 and non_aces + Deck.ace.value[1] <= 21:
+        return non_aces + aces + Deck.ace.value[1] - Deck.ace.value[0]
+    return non_aces + aces
+
+
+def draw(non_aces, aces, value):
+    """
+    Return: the hand after drawing a card of `value`
+    """
+    if value == Deck.ace.value[0]:
+        return non_aces, aces + 1
+    return non_aces + value, aces
+
+
+def dealer_outcomes(upcard):
+    """
+    Return: {final sum: probability} of the dealer starting with `upcard`,
+    all the sums over 21 counted as BUST
+    """
+    outcomes = dict.fromkeys(list(range(DEALER_STANDS_OVER + 1, 22)) +
+                             [BUST], 0.0)
+    hands = {draw(0, 0, upcard): 1.0}
+    # every card adds at least 1, so the hands end in a few steps
+    while hands:
+        drawn = {}
+        for (non_aces, aces), p in hands.items():
+            total = hand_total(non_aces, aces)
+            if total > 21:
+                outcomes[BUST] += p
+            elif total > DEALER_STANDS_OVER:
+                outcomes[total] += p
+            else:
+                for value, p_card in CARD_PROBABILITIES.items():
+                    hand = draw(non_aces, aces, value)
+                    drawn[hand] = drawn.get(hand, 0.0) + p * p_card
+        hands = drawn
+    return outcomes
+
+
+def _index(non_aces, aces, upcard):
+    return (non_aces * MAX_ACES + aces) * len(UPCARDS) + upcard - 1
+
+
+class BasicStrategyTable:
+    def __init__(self, cache_file=CACHE_FILE):
+        """
+        Load the tables from `cache_file`, or compute them and save them
+        there (None - always compute, nothing saved)
+        """
+        self.__signature = (CACHE_VERSION, DEALER_STANDS_OVER, PAYOUT,
+                            tuple(sorted(CARD_PROBABILITIES.items())))
+        if cache_file is None or not self.__load(cache_file):
+            self.__compute()
+            if cache_file is not None:
+                self.__save(cache_file)
+
+    def __compute(self):
+        """
+        Expected value of standing and hitting, for each hand and dealer
+        card - from the hands with the most cards down to the empty one
+        """
+        size = MAX_NON_ACES * MAX_ACES * len(UPCARDS)
+        self.stand_ev = array.array('d', [-1.0]) * size
+        self.hit_ev = array.array('d', [-1.0]) * size
+        # 'h' / 's' (the hands over 21 are never asked)
+        self.decisions = bytearray(b's') * size
+
+        for upcard in UPCARDS:
+            dealer = dealer_outcomes(upcard)
+            # the cards only add up - every hand depends on hands with a
+            # bigger hard total (aces counted as 1)
+            for hard_total in range(21, -1, -1):
+                for aces in range(min(hard_total, MAX_ACES - 1) + 1):
+                    non_aces = hard_total - aces
+                    total = hand_total(non_aces, aces)
+                    if total > 21:
+                        continue
+                    i = _index(non_aces, aces, upcard)
+                    self.stand_ev[i] = PAYOUT * sum(
+                        p if total > final or final == BUST else
+                        -p if total < final else 0.0
+                        for final, p in dealer.items())
+                    self.hit_ev[i] = sum(
+                        p * self.__best_ev(*draw(non_aces, aces, value),
+                                           upcard)
+                        for value, p in CARD_PROBABILITIES.items())
+                    if self.hit_ev[i] > self.stand_ev[i]:
+                        self.decisions[i] = ord('h')
+        log.info('Basic strategy computed')
+
+    def __best_ev(self, non_aces, aces, upcard):
+        if hand_total(non_aces, aces) > 21:
+            return -1.0
+        i = _index(non_aces, aces, upcard)
+        return max(self.stand_ev[i], self.hit_ev[i])
+
+    def __load(self, cache_file):
+        try:
+            with open(cache_file, 'rb') as f:
+                cache = pickle.load(f)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            return False
+        if cache.get('signature') != self.__signature:
+            return False
+        self.stand_ev = cache['stand_ev']
+        self.hit_ev = cache['hit_ev']
+        self.decisions = cache['decisions']
+        return True
+
+    def __save(self, cache_file):
+        cache = {
+            'signature': self.__signature,
+            'stand_ev': self.stand_ev,
+            'hit_ev': self.hit_ev,
+            'decisions': self.decisions,
+        }
+        tmp_file = cache_file + '.tmp'
+        try:
+            with open(tmp_file, 'wb') as f:
+                pickle.dump(cache, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_file, cache_file)
+        except OSError as err:
+            log.warning('Basic strategy not cached in %s: %s' %
+                        (cache_file, err))
+
+    def decide(self, non_aces, aces, upcard):
+        """
+        Return: 'h' or 's' for the hand against the dealer's `upcard`
+        """
+        return chr(self.decisions[_index(non_aces, aces, upcard)])
+
+    def expected_value(self, non_aces, aces, upcard):
+        """
+        Return: (stand, hit) expected values, in bets
+        """
+        i = _index(non_aces, aces, upcard)
+        return self.stand_ev[i], self.hit_ev[i]
+
+    def edge(self):
+        """
+        Return: the expected value of a round, in bets, when playing the
+        basic strategy (negative - the house has the edge)
+        """
+        ev = 0.0
+        for upcard, p_up in CARD_PROBABILITIES.items():
+            for first, p_first in CARD_PROBABILITIES.items():
+                for second, p_second in CARD_PROBABILITIES.items():
+                    hand = draw(*draw(0, 0, first), second)
+                    ev += (p_up * p_first * p_second *
+                           self.__best_ev(*hand, upcard))
+        return ev
+
+    def __str__(self):
+        """
+        The usual chart - hard sums (no aces) and soft sums (one ace)
+        """
+        fmt = ' %4s |' + ' %2s' * len(UPCARDS)
+        upcards = ['A' if upcard == 1 else upcard for upcard in UPCARDS]
+        lines = [fmt % tuple(['Hard'] + upcards)]
+        for total in range(4, 22):
+            lines.append(fmt % tuple([total] + [
+                self.decide(total, 0, upcard) for upcard in UPCARDS]))
+        lines.append(fmt % tuple(['Soft'] + upcards))
+        for total in range(12, 22):
+            lines.append(fmt % tuple([total] + [
+                self.decide(total - 11, 1, upcard) for upcard in UPCARDS]))
+        return '\n'.join(lines)
+
+
+class BasicStrategy:
+    """
+    Automated strategy
+        - bets the same amount every round (or all in if it has less)
+        - hits or stands as the basic strategy says
+    """
+    def __init__(self, bet_value=10, table=None):
+        self.bet_value = bet_value
+        self.table = table if table is not None else BasicStrategyTable()
+
+    def __repr__(self):
+        return 'BasicStrategy(bet_value=%d)' % self.bet_value
+
+    def bet(self, player):
+        return min(self.bet_value, player.jetoane)
+
+    def decide(self, player, dealer):
+        return self.table.decide(player.hard_total - player.aces,
+                                 player.aces, dealer.hard_total)
@@ -0,0 +1,229 @@
+"""
+Benchmarks
+
+Each benchmark runs, headless, a number of operations and is timed with
+`time.perf_counter` - the best of `repeat` runs is kept:
+    hand_sums   - `IPlayer.draw_card` + `get_cards_sum` for every hand of
+                  2 to 5 cards (all the combinations of ranks)
+    shuffle     - `Deck.shuffle` of a 1 and a 6 packs shoe (`seeded`), and
+                  of a 6 packs shoe with each generator in `rng.BACKENDS`
+    draw_card   - `Deck.draw_card`, whole shoes
+    settlement  - `game_outcome.get` only, on rounds already played
+    rounds      - full headless rounds (`simulate`) at 1..`seats` seats
+
+The results are saved as JSON; two result files can be compared and the
+benchmarks that got slower than a threshold are flagged
+"""
+import json
+import time
+import random
+import logging
+import platform
+import itertools
+
+from blackjack.util import headless
+from blackjack.deck import Deck
+from blackjack.game import Game
+from blackjack.game_outcome import game_outcome
+from blackjack.player import Player
+from blackjack.strategy import ThresholdStrategy
+from blackjack.simulation import simulate
+from blackjack import rng as rngs
+
+log = logging.getLogger("benchmark")
+
+RESULTS_VERSION = 1
+
+
+def bench_hand_sums(scale):
+    """
+    Every hand of 2..5 cards, one card code per rank
+    """
+    codes = [rank * len(Deck.card_suites)
+             for rank in range(len(Deck.card_names))]
+    hands = [hand for cards in range(2, 6)
+             for hand in itertools.combinations_with_replacement(codes,
+                                                                 cards)]
+    player = Player('bench', '', 0, '', 0, ThresholdStrategy())
+    passes = max(1, int(scale))
+    start = time.perf_counter()
+    for i in range(passes):
+        for hand in hands:
+            player.reset()
+            for code in hand:
+                player.draw_card(code)
+            player.get_cards_sum()
+    return passes * len(hands), time.perf_counter() - start
+
+
+def _bench_shuffle(decks, scale, backend='seeded'):
+    deck = Deck(rngs.make(backend, 1), decks)
+    shuffles = max(1, int(2000 * scale / decks))
+    start = time.perf_counter()
+    for i in range(shuffles):
+        deck.reset()
+        deck.shuffle()
+    return shuffles, time.perf_counter() - start
+
+
+def bench_shuffle_1_deck(scale):
+    return _bench_shuffle(1, scale)
+
+
+def bench_shuffle_6_decks(scale):
+    return _bench_shuffle(6, scale)
+
+
+def bench_draw_card(scale):
+    deck = Deck(random.Random(1), 6)
+    deck.shuffle()
+    shoes = max(1, int(200 * scale))
+    cards = len(deck.shoe)
+    start = time.perf_counter()
+    for i in range(shoes):
+        deck.position = 0
+        for j in range(cards):
+            deck.draw_card()
+    return shoes * cards, time.perf_counter() - start
+
+
+def bench_settlement(scale, seats=7):
+    """
+    Play the rounds up to the outcome, only the outcome is timed
+    """
+    players = [Player('seat%d' % seat, '', 0, '', 10 ** 9,
+                      ThresholdStrategy(12 + seat, 10))
+               for seat in range(seats)]
+    game = Game(players=players, rng=random.Random(1), seats=seats, decks=6)
+    outcome = game_outcome(game)
+    rounds = max(1, int(2000 * scale))
+    elapsed = 0.0
+    for i in range(rounds):
+        game.start_round()
+        game.begin_round()
+        for player in players:
+            while not game.play(player,
+                                player.strategy.decide(player, game.dealer)):
+                pass
+        if not game.players.all_lost():
+            while game.dealer.get_cards_sum() <= 17:
+                game.hit(game.dealer)
+        start = time.perf_counter()
+        outcome.get()
+        elapsed += time.perf_counter() - start
+        game.reset()
+    return rounds, elapsed
+
+
+def bench_rounds(scale, seats):
+    rounds = max(1, int(2000 * scale))
+    result = simulate(rounds, [ThresholdStrategy() for seat in range(seats)],
+                      seed=1, decks=6)
+    return result.rounds, result.elapsed
+
+
+def benchmarks(seats=4):
+    """
+    Return: [(name, function(scale) -> (operations, seconds))]
+    """
+    tests = [
+        ('hand_sums', bench_hand_sums),
+        ('shuffle_1_deck', bench_shuffle_1_deck),
+        ('shuffle_6_decks', bench_shuffle_6_decks),
+        ('draw_card', bench_draw_card),
+        ('settlement', bench_settlement),
+    ]
+    for backend in sorted(rngs.BACKENDS):
+        tests.append(('shuffle_6_decks_%s' % backend,
+                      lambda scale, backend=backend:
+                      _bench_shuffle(6, scale, backend)))
+    for n in range(1, seats + 1):
+        tests.append(('rounds_%d_seats' % n,
+                      lambda scale, n=n: bench_rounds(scale, n)))
+    return tests
+
+
+def run(scale=1.0, repeat=3, seats=4, select=None):
+    """
+    Run the benchmarks (those whose name contains `select`, all if None)
+    Return: {name: {'ops': .., 'seconds': .., 'ops_per_second': ..}}
+    """
+    results = {}
+    with headless():
+        for name, bench in benchmarks(seats):
+            if select is not None and select not in name:
+                continue
+            best = None
+            for i in range(repeat):
+                ops, seconds = bench(scale)
+                if best is None or seconds < best[1]:
+                    best = (ops, seconds)
+            ops, seconds = best
+            results[name] = {
+                'ops': ops,
+                'seconds': seconds,
+                'ops_per_second': ops / seconds if seconds > 0 else 0.0,
+            }
+            log.info('%s: %d ops in %.3fs' % (name, ops, seconds))
+    return results
+
+
+def save(results, results_file):
+    with open(results_file, 'w') as f:
+        json.dump({
+            'version': RESULTS_VERSION,
+            'python': platform.python_version(),
+            'machine': platform.machine(),
+            'time': time.strftime('%Y-%m-%d %H:%M:%S'),
+            'results': results,
+        }, f, indent=2)
+
+
+def load(results_file):
+    """
+    Return: the results saved in `results_file`
+    """
+    with open(results_file) as f:
+        saved = json.load(f)
+    if saved.get('version') != RESULTS_VERSION:
+        raise ValueError('%s: unknown results version %r' %
+                         (results_file, saved.get('version')))
+    return saved['results']
+
+
+def compare(old, new, threshold=0.1):
+    """
+    Compare the throughput of two runs
+    threshold - how much slower (0.1 - 10%) counts as a regression
+    Return: [(name, old ops/s, new ops/s, change, regressed)] for the
+    benchmarks in both runs
+    """
+    rows = []
+    for name in new:
+        if name not in old:
+            continue
+        before = old[name]['ops_per_second']
+        after = new[name]['ops_per_second']
+        change = (after - before) / before if before > 0 else 0.0
+        rows.append((name, before, after, change, change < -threshold))
+    return rows
+
+
+def format_results(results):
+    fmt = ' %-22s | %12s | %10s | %14s'
+    lines = [fmt % ('Benchmark', 'Ops', 'Seconds', 'Ops/s'), '-' * 68]
+    for name, result in results.items():
+        lines.append(fmt % (name, result['ops'], '%.4f' % result['seconds'],
+                            '%.0f' % result['ops_per_second']))
+    return '\n'.join(lines)
+
+
+def format_comparison(rows):
+    fmt = ' %-22s | %14s | %14s | %8s %s'
+    lines = [fmt % ('Benchmark', 'Before ops/s', 'After ops/s', 'Change', ''),
+             '-' * 76]
+    for name, before, after, change, regressed in rows:
+        lines.append(fmt % (name, '%.0f' % before, '%.0f' % after,
+                            '%+.1f%%' % (change * 100),
+                            '<< REGRESSION' if regressed else ''))
+    return '\n'.join(lines)
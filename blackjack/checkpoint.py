@@ -0,0 +1,179 @@
+"""
+Game checkpoints
+
+The whole state of a `Game` between two rounds, in one small binary file:
+    - the game: rounds played, hands played, reshuffles
+    - the dealer: jetoane, borrows
+    - the shoe: the cards, in order, the position and the cut card
+    - the state of the deck's random number generator (if it has one - the
+      CSPRNG hasn't), so a resumed game deals the same cards the
+      uninterrupted one would have
+    - the players at the table and the ones who went broke: name, age,
+      nationality, jetoane
+    - `extra` bytes of the caller (the results of a simulation, ...)
+
+The file is written next to its final place and renamed over it, so a
+checkpoint is either the old one or the new one, never half written. The
+strategies aren't saved: the players found in the game, by name, keep
+theirs, the others get the default one. Neither is a `ShoePool`: it
+shuffles ahead, on its own thread, so its state isn't the game's - a game
+with a pool can't be checkpointed
+"""
+import os
+import struct
+import logging
+
+from blackjack.player import Player
+from blackjack.rng import has_state
+
+log = logging.getLogger("checkpoint")
+
+MAGIC = b'BJC1'
+VERSION = 1
+HEADER = struct.Struct('<4sH')
+# rounds_played, hands_played, reshuffles, dealer jetoane, dealer borrows,
+# decks, shoe position, cut card, players, went broke, has rng
+GAME = struct.Struct('<QQIqIHIIIIB')
+# `random.Random` state: version, 624 words + index, gauss_next
+RNG_WORDS = 625
+RNG = struct.Struct('<I%dIBd' % RNG_WORDS)
+# jetoane, varsta, broke
+PLAYER = struct.Struct('<qHB')
+LENGTH = struct.Struct('<I')
+
+
+def _pack_text(text):
+    data = text.encode('utf-8')
+    return LENGTH.pack(len(data)) + data
+
+
+def _unpack_text(data, offset):
+    size, = LENGTH.unpack_from(data, offset)
+    offset += LENGTH.size
+    return data[offset:offset + size].decode('utf-8'), offset + size
+
+
+def pack(game, extra=b''):
+    """
+    Return: the state of `game` (between two rounds) as bytes
+    """
+    deck = game.deck
+    dealer = game.dealer
+    seated = game.players.players
+    broke = [player for player in game.players.broke_players
+             if player not in seated]
+    parts = [
+        HEADER.pack(MAGIC, VERSION),
+        GAME.pack(game.rounds_played, game.hands_played, game.reshuffles,
+                  dealer.jetoane, dealer.borrows, deck.decks, deck.position,
+                  deck.cut, len(seated) + len(broke),
+                  game.players.went_broke, has_state(deck.rng)),
+        deck.shoe.tobytes(),
+    ]
+    if has_state(deck.rng):
+        version, words, gauss = deck.rng.getstate()
+        parts.append(RNG.pack(version, *words, gauss is not None,
+                              gauss or 0.0))
+    for players, is_broke in ((seated, False), (broke, True)):
+        for player in players:
+            parts.append(PLAYER.pack(player.jetoane, player.varsta,
+                                     is_broke))
+            parts.append(_pack_text(player.nume))
+            parts.append(_pack_text(player.prenume))
+            parts.append(_pack_text(player.nationalitate))
+    parts.append(LENGTH.pack(len(extra)) + extra)
+    return b''.join(parts)
+
+
+def unpack(game, data):
+    """
+    Put the state in `data` back in `game` (same number of packs)
+    Return: the `extra` bytes saved with it
+    Raise: ValueError if `data` isn't a checkpoint of such a game
+    """
+    magic, version = HEADER.unpack_from(data)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError('not a checkpoint of version %d' % VERSION)
+    offset = HEADER.size
+    (rounds_played, hands_played, reshuffles, dealer_jetoane, borrows,
+     decks, position, cut, players_count, went_broke, has_rng) = \
+        GAME.unpack_from(data, offset)
+    offset += GAME.size
+    deck = game.deck
+    if decks != deck.decks:
+        raise ValueError('the checkpoint has a shoe of %d decks, not %d' %
+                         (decks, deck.decks))
+    shoe = data[offset:offset + len(deck.shoe)]
+    offset += len(deck.shoe)
+    if has_rng:
+        fields = RNG.unpack_from(data, offset)
+        offset += RNG.size
+        if has_state(deck.rng):
+            version, words, has_gauss, gauss = (fields[0],
+                                                fields[1:1 + RNG_WORDS],
+                                                fields[-2], fields[-1])
+            deck.rng.setstate((version, words,
+                               gauss if has_gauss else None))
+
+    # the players of the game keep their strategies
+    known = {player.nume: player
+             for player in game.players.players + game.players.broke_players}
+    seated = []
+    broke = []
+    for i in range(players_count):
+        jetoane, varsta, is_broke = PLAYER.unpack_from(data, offset)
+        offset += PLAYER.size
+        nume, offset = _unpack_text(data, offset)
+        prenume, offset = _unpack_text(data, offset)
+        nationalitate, offset = _unpack_text(data, offset)
+        player = known.pop(nume, None)
+        if player is None:
+            player = Player(nume, prenume, varsta, nationalitate, jetoane)
+        player.jetoane = jetoane
+        (broke if is_broke else seated).append(player)
+    size, = LENGTH.unpack_from(data, offset)
+    offset += LENGTH.size
+    extra = data[offset:offset + size]
+
+    game.players.seat(seated)
+    game.players.broke_players = broke
+    game.players.went_broke = went_broke
+    game.players.reset_for_new_game()
+    game.dealer.reset_for_new_game()
+    game.dealer.jetoane = dealer_jetoane
+    game.dealer.borrows = borrows
+    game.rounds_played = rounds_played
+    game.hands_played = hands_played
+    game.reshuffles = reshuffles
+    game.total_bets = 0
+    deck.cut = cut
+    deck.restore(shoe, position)
+    return extra
+
+
+def save(game, path, extra=b''):
+    """
+    Write the checkpoint of `game` in `path`, atomically
+    """
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(pack(game, extra))
+    os.replace(tmp_path, path)
+
+
+def restore(game, path):
+    """
+    Resume `game` from the checkpoint in `path`
+    Return: the `extra` bytes saved with it, None if there's no checkpoint
+    """
+    try:
+        with open(path, 'rb') as f:
+            data = f.read()
+    except FileNotFoundError:
+        return None
+    try:
+        extra = unpack(game, data)
+    except struct.error as err:
+        raise ValueError('%s: truncated checkpoint (%s)' % (path, err))
+    log.info('Resumed from %s at round %d' % (path, game.rounds_played))
+    return extra
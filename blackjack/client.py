@@ -0,0 +1,102 @@
+"""
+Client for the game server (`blackjack.server`)
+
+Plays either interactively, at the console, or automatically with the
+`ThresholdStrategy` rules - handy to load the server with many clients
+"""
+import json
+import asyncio
+
+
+async def connect(host='127.0.0.1', port=8021, path=None):
+    if path is not None:
+        return await asyncio.open_unix_connection(path)
+    return await asyncio.open_connection(host, port)
+
+
+async def send(writer, **message):
+    writer.write(json.dumps(message).encode() + b'\n')
+    await writer.drain()
+
+
+async def ask(prompt):
+    """
+    input() without blocking the event loop
+    """
+    return await asyncio.to_thread(input, prompt)
+
+
+async def play(reader, writer, name, jetoane, strategy=None, rounds=None,
+               verbose=True):
+    """
+    Join the server as `name` and play until broke (or `rounds` rounds)
+
+    strategy - `ThresholdStrategy`-like (stand_on, bet_value)
+               None - ask at the console
+    Return: the amount of money at the end
+    """
+    def show(msg):
+        if verbose:
+            print(msg)
+
+    await send(writer, join=name, jetoane=jetoane)
+    played = 0
+    # the last "bet" / "decide" message, asked again if the answer is
+    # refused
+    question = None
+    try:
+        while rounds is None or played < rounds:
+            line = await reader.readline()
+            if not line:
+                show(' > Server closed the connection')
+                break
+            message = json.loads(line)
+            kind = message.get('type')
+            if kind == 'error':
+                show(' > %s' % message['message'])
+                if strategy is None and question is not None:
+                    # the answer was refused - ask again, the server is
+                    # still waiting for it
+                    message = question
+                    kind = message['type']
+            question = message if kind in ('bet', 'decide') else None
+
+            if kind == 'seated':
+                show(' > Seated at table %d' % message['table'])
+            elif kind == 'bet':
+                if strategy is None:
+                    answer = await ask(' > %s place your bet [%d$]: ' %
+                                       (name, message['jetoane']))
+                    try:
+                        bet_value = int(answer)
+                    except ValueError:
+                        bet_value = 0
+                else:
+                    bet_value = min(strategy.bet_value, message['jetoane'])
+                await send(writer, bet=bet_value, id=message['id'])
+            elif kind == 'decide':
+                if strategy is None:
+                    answer = await ask('%s [%s] - %d vs dealer [%s]:'
+                                       ' (h)it or (s)tand? ' %
+                                       (name, message['hand'],
+                                        message['sum'], message['dealer']))
+                    answer = answer.lower()
+                else:
+                    answer = 'h' if message['sum'] < strategy.stand_on \
+                        else 's'
+                await send(writer, action=answer, id=message['id'])
+            elif kind == 'result':
+                played += 1
+                jetoane = message['jetoane']
+                show(' > [%s] - %d vs dealer [%s] - %d : %+d$ [%d$]' %
+                     (message['hand'], message['sum'], message['dealer'],
+                      message['dealer_sum'], message['delta'], jetoane))
+            elif kind == 'timeout':
+                show(' > Too late! Played %r instead' % message['default'])
+            elif kind == 'broke':
+                show(' > %s is broke! :(' % name)
+                jetoane = 0
+                break
+    finally:
+        writer.close()
+    return jetoane
@@ -0,0 +1,124 @@
+"""
+Card counting
+
+A `CardCounter` subscribes to a `Deck` and keeps the running count of a tag
+system as the cards are drawn - one addition per card, no rescanning of
+the shoe. The count starts over every time the shoe is reset / replaced.
+
+Tag systems (weights by card value, aces are 1):
+    HI_LO - 2..6 +1, 7..9 0, 10s and aces -1 (balanced)
+    KO    - 2..7 +1, 8..9 0, 10s and aces -1 (unbalanced - the count
+            starts at 4 - 4 * decks, so the key count is 0-ish)
+    or any `TagSystem` with custom weights
+
+The true count is the running count per pack left in the shoe
+"""
+import array
+import logging
+
+from blackjack.deck import Deck
+
+log = logging.getLogger("counting")
+
+
+class TagSystem:
+    def __init__(self, name, tags, start_per_deck=0):
+        """
+        tags           - {card value: weight}, the values not given are 0
+        start_per_deck - the count starts at `start_per_deck` * (decks - 1)
+                         (unbalanced systems)
+        """
+        self.name = name
+        self.tags = tags
+        self.start_per_deck = start_per_deck
+        # weight of each card code - a single lookup per card drawn
+        self.weights = array.array('b', [tags.get(value, 0)
+                                         for value in Deck.card_values])
+
+    def __repr__(self):
+        return 'TagSystem(%r)' % self.name
+
+    def balanced(self):
+        """
+        Return True if a whole pack counts 0
+        """
+        return sum(self.weights) == 0
+
+    def start(self, decks):
+        return self.start_per_deck * (decks - 1)
+
+
+HI_LO = TagSystem('hi-lo', {2: 1, 3: 1, 4: 1, 5: 1, 6: 1, 10: -1, 1: -1})
+KO = TagSystem('ko', {2: 1, 3: 1, 4: 1, 5: 1, 6: 1, 7: 1, 10: -1, 1: -1},
+               start_per_deck=-4)
+SYSTEMS = {system.name: system for system in (HI_LO, KO)}
+
+
+class CardCounter:
+    def __init__(self, system=HI_LO, deck=None):
+        """
+        Count the cards of `deck` (or of the deck given later to `attach`)
+        with the tag `system`
+        """
+        self.system = system
+        self.__weights = system.weights
+        self.deck = None
+        self.running = 0
+        self.seen = 0
+        # number of shoes counted
+        self.shoes = 0
+        if deck is not None:
+            self.attach(deck)
+
+    def attach(self, deck):
+        if self.deck is not None:
+            self.deck.unsubscribe(self)
+        self.deck = deck
+        deck.subscribe(self)
+
+    def card_drawn(self, code):
+        self.running += self.__weights[code]
+        self.seen += 1
+
+    def shoe_reset(self, deck):
+        self.running = self.system.start(deck.decks)
+        self.seen = 0
+        self.shoes += 1
+
+    def decks_left(self):
+        """
+        Return: the packs left in the shoe (half a pack at least)
+        """
+        return max(self.deck.cards_left() / Deck.DECK_SIZE, 0.5)
+
+    def true_count(self):
+        return self.running / self.decks_left()
+
+    def __repr__(self):
+        return 'CardCounter(%s: running=%d, true=%.2f)' % (
+            self.system.name, self.running, self.true_count())
+
+
+class CountingStrategy:
+    """
+    Automated strategy
+        - bets `bet_value` times the true count (at least once, at most
+          `spread` times)
+        - hits or stands as the `play` strategy does
+    """
+    def __init__(self, counter, play, bet_value=10, spread=8):
+        self.counter = counter
+        self.play = play
+        self.bet_value = bet_value
+        self.spread = spread
+
+    def __repr__(self):
+        return 'CountingStrategy(%s, %r, bet_value=%d, spread=%d)' % (
+            self.counter.system.name, self.play, self.bet_value, self.spread)
+
+    def bet(self, player):
+        units = min(max(int(self.counter.true_count()), 1), self.spread)
+        return min(units * self.bet_value, player.jetoane)
+
+    def decide(self, player, dealer):
+        return self.play.decide(player, dealer)
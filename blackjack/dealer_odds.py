@@ -0,0 +1,101 @@
+"""
+Dealer odds
+
+Probability of each final sum of the dealer, given its card and the exact
+cards left in the shoe - the dealer hits as long as its sum is 17 or less
+(as in `Game`), the cards are drawn without putting them back.
+
+The shoe is described by how many cards of each value are left (aces 1,
+tens / jacks / queens / kings 10); the recursion and the queries are
+memoized on that key (LRU), so the sub-shoes shared by the branches, and
+by the next queries of a round, are computed only once
+"""
+import functools
+import logging
+
+from blackjack.deck import Deck
+from blackjack.basic_strategy import hand_total, draw, BUST, \
+    DEALER_STANDS_OVER
+
+log = logging.getLogger("dealer_odds")
+
+CACHE_SIZE = 1 << 16
+# card values, in the order of the counts
+VALUES = tuple(range(1, 11))
+# card code -> card value, to count a shoe with `bytes.translate`
+_CODE_VALUES = bytes(Deck.card_values) + bytes(256 - Deck.DECK_SIZE)
+
+
+def rank_counts(deck):
+    """
+    Return: the number of cards of each value (VALUES) left in `deck`
+    """
+    left = deck.shoe[deck.position:].tobytes().translate(_CODE_VALUES)
+    return tuple(left.count(value) for value in VALUES)
+
+
+@functools.lru_cache(maxsize=CACHE_SIZE)
+def _final_sums(counts, non_aces, aces):
+    """
+    Return: probability of each final sum (index 0..BUST) of the dealer's
+    hand (non_aces, aces), drawing from a shoe with `counts`
+    """
+    total = hand_total(non_aces, aces)
+    odds = [0.0] * (BUST + 1)
+    if total > 21:
+        odds[BUST] = 1.0
+        return tuple(odds)
+    cards = sum(counts)
+    # stands - or can't draw any more
+    if total > DEALER_STANDS_OVER or cards == 0:
+        odds[total] = 1.0
+        return tuple(odds)
+    for i, count in enumerate(counts):
+        if count == 0:
+            continue
+        p = count / cards
+        left = counts[:i] + (count - 1,) + counts[i + 1:]
+        for final, p_final in enumerate(
+                _final_sums(left, *draw(non_aces, aces, VALUES[i]))):
+            odds[final] += p * p_final
+    return tuple(odds)
+
+
+@functools.lru_cache(maxsize=CACHE_SIZE)
+def _upcard_sums(counts, upcard):
+    """
+    Return: ((final sum, probability), ...) of `final_sums` - a tuple, the
+    cached answer can't be changed by a caller
+    """
+    odds = _final_sums(counts, *draw(0, 0, upcard))
+    return tuple((total, p) for total, p in enumerate(odds) if p > 0)
+
+
+def final_sums(counts, upcard):
+    """
+    Return: {final sum: probability} of the dealer showing `upcard` (card
+    value, 1 - ace), for a shoe with `counts` cards of each value left;
+    the sums over 21 are all BUST
+    The dict is new at every call - it's the caller's
+    """
+    return dict(_upcard_sums(counts, upcard))
+
+
+def dealer_odds(deck, upcard):
+    """
+    Return: {final sum: probability} of the dealer whose card is `upcard`
+    (card code), with the cards left in `deck`
+    """
+    return final_sums(rank_counts(deck), Deck.card_values[upcard])
+
+
+def cache_info():
+    """
+    Return: the hits / misses of the recursion's cache
+    """
+    return _final_sums.cache_info()
+
+
+def cache_clear():
+    _final_sums.cache_clear()
+    _upcard_sums.cache_clear()
@@ -1,25 +1,39 @@
-import random
+import array
 import logging
 
-from blackjack.util import delay
+from blackjack import rng as rngs
+from blackjack.util import delay, log_and_print
 
 log = logging.getLogger("deck")
 
 
-def log_and_print(msg, log_f=logging.info, end='\n'):
-    log_f(msg)
-    print(msg, end=end)
-
-
 class Card:
+    """
+    An immutable playing card - the 52 of them are created once
+    (`Deck.cards`) and shared by all the shoes
+    """
+    __slots__ = ('type', 'suite', 'value', 'display_str')
+
     def __init__(self, type, suite, value):
         """
         Create a Card object
         """
-        self.type = type
-        self.suite = suite
-        self.display_str = self.type + self.suite
-        self.value = value
+        object.__setattr__(self, 'type', type)
+        object.__setattr__(self, 'suite', suite)
+        object.__setattr__(self, 'display_str', type + suite)
+        object.__setattr__(self, 'value', value)
+
+    def __setattr__(self, name, value):
+        raise AttributeError('Card objects are immutable')
+
+    def __delattr__(self, name):
+        raise AttributeError('Card objects are immutable')
+
+    def __reduce__(self):
+        # pickled as its code - unpickled as the shared card of that code
+        rank = [name for name, value in Deck.card_names].index(self.type)
+        suite = Deck.card_suites.index(self.suite)
+        return Deck.card, (rank * len(Deck.card_suites) + suite,)
 
     def __str__(self):
         return self.display_str
@@ -27,58 +41,186 @@ class Card:
 
 class Deck:
     ace_card = " A"
-    ace = Card(" A", "♠", [1, 11])
 
     card_names = [
         (" 2", 2),  (" 3", 3),       (" 4", 4),  (" 5", 5),
         (" 6", 6),  (" 7", 7),       (" 8", 8),  (" 9", 9),
-        ("10", 10), (" A", [1, 11]), (" J", 10), (" Q", 10),
+        ("10", 10), (" A", (1, 11)), (" J", 10), (" Q", 10),
         (" K", 10)
     ]
     card_suites = ["♠", "♥", "♦", "♣"]
 
-    def __init__(self):
+    # The deck holds cards as codes (small integers), not `Card` objects:
+    #   code = rank * 4 + suite
+    # where `rank` is the index in `card_names` and `suite` the index in
+    # `card_suites`. `cards[code]` is the (shared) `Card` of a code
+    DECK_SIZE = len(card_names) * len(card_suites)
+    ace_rank = 9
+    # the 52 cards, by code - filled in after the class
+    cards = ()
+    # the ace of spades - its `value` has both values of an ace
+    ace = None
+    # value of each card code - the aces are counted as `1` here
+    card_values = []
+    # dots shown while shuffling (the cards are shuffled only once)
+    shuffle_dots = 10
+
+    def __init__(self, rng=None, decks=1, penetration=None):
         """
-        Create a deck of 52 standard cards
+        Create a shoe of `decks` packs of 52 standard cards
+
+        rng         - random number generator used for shuffling
+                      (`random.Random`, see `blackjack.rng`)
+                      None - a `SecureRandom`, from the OS CSPRNG
+        penetration - fraction of the shoe dealt before the cut card
+                      None - no cut card, the whole shoe is used
         """
+        self.rng = rng if rng is not None else rngs.SecureRandom()
+        self.decks = decks
+        self.shoe = self.new_shoe(decks)
+        # index of the next card to be drawn
+        self.position = 0
+        # index of the cut card - reaching it means it's time to shuffle
+        if penetration is None:
+            self.cut = len(self.shoe)
+        else:
+            self.cut = int(len(self.shoe) * penetration)
+        # told about every card drawn and every new shoe - see `subscribe`
+        self.listeners = []
         log_and_print(' > Got a new fresh deck...')
-        self.card_deck = [Card(card[0], suite, card[1])
-                          for card in self.card_names
-                          for suite in self.card_suites]
+
+    @classmethod
+    def new_shoe(cls, decks=1):
+        """
+        Return: the card codes of `decks` packs, in order
+        """
+        return array.array('B', range(cls.DECK_SIZE)) * decks
+
+    @classmethod
+    def card(cls, code):
+        """
+        Return: the `Card` object for the card `code`
+        """
+        return cls.cards[code]
+
+    @classmethod
+    def is_ace(cls, code):
+        return code // 4 == cls.ace_rank
+
+    @property
+    def card_deck(self):
+        """
+        The cards left in the deck, as `Card` objects (for display only)
+        """
+        return [self.card(code) for code in self.shoe[self.position:]]
+
+    def subscribe(self, listener):
+        """
+        `listener.card_drawn(code)` is called for every card drawn and
+        `listener.shoe_reset(deck)` when the cards are put back / replaced
+        """
+        self.listeners.append(listener)
+        listener.shoe_reset(self)
+
+    def unsubscribe(self, listener):
+        self.listeners.remove(listener)
+
+    def __shoe_reset(self):
+        for listener in self.listeners:
+            listener.shoe_reset(self)
+
+    def cards_left(self):
+        return len(self.shoe) - self.position
+
+    def needs_shuffle(self, cards_needed=0):
+        """
+        Return True if the cut card was reached or if there are less than
+        `cards_needed` cards left
+        """
+        return (self.position >= self.cut or
+                self.cards_left() < cards_needed)
 
     def log(self):
         """
         Log the deck in its current state
         """
-        log.debug("Deck: [%d cards]" % len(self.card_deck))
+        # don't build the cards list for nothing
+        if not log.isEnabledFor(logging.DEBUG):
+            return
+        cards_left = self.cards_left()
+        log.debug("Deck: [%d cards]" % cards_left)
 
         GROUP_CARDS = 16
-        for idx in range(0, len(self.card_deck) + 1, GROUP_CARDS):
-            tmp = [self.card_deck[i]
-                   for i in range(0 + idx,
-                                  min(len(self.card_deck), GROUP_CARDS+idx))]
+        for idx in range(self.position, len(self.shoe) + 1, GROUP_CARDS):
+            tmp = [self.card(self.shoe[i])
+                   for i in range(idx, min(len(self.shoe), GROUP_CARDS+idx))]
             log.debug(' '.join(map(str, tmp)))
 
-    def shuffle(self):
+    def reset(self):
         """
-        Shuffle the deck for a random number of times
+        Put all the cards back in the deck
+        The order of the cards is kept - shuffle the deck before using it
         """
-        log_and_print(' > Shuffling the cards', end='')
-        random.seed()
+        log_and_print(' > Got a new fresh deck...')
+        self.position = 0
+        self.__shoe_reset()
 
-        number_of_shuffles = random.randrange(10, 50)
+    def load(self, shoe):
+        """
+        Replace the cards with the already shuffled `shoe`
+        (same number of packs)
+        Return: the previous shoe - it can be recycled
+        """
+        log_and_print(' > Got a new shuffled deck...')
+        previous = self.shoe
+        self.shoe = shoe
+        self.position = 0
+        self.__shoe_reset()
+        return previous
 
-        log.debug("Shuffling the deck %d times" % number_of_shuffles)
-        for i in range(0, number_of_shuffles):
-            delay(random.randrange(30, 70, 5))
-            random.shuffle(self.card_deck)
+    def shuffle(self):
+        """
+        Shuffle the deck - once, one uniform shuffle is enough
+        The whole deck is shuffled in place - `reset` it first if cards
+        were already drawn
+        """
+        log_and_print(' > Shuffling the cards', end='')
+        self.rng.shuffle(self.shoe)
+        for i in range(self.shuffle_dots):
+            delay(50)
 
         log_and_print('')
         log_and_print(" > Deck shuffled")
 
+    def restore(self, shoe, position):
+        """
+        Continue with the cards of `shoe` (bytes / card codes), `position`
+        of them already drawn - the listeners are told about those too
+        """
+        self.shoe = array.array('B', shoe)
+        self.position = position
+        for listener in self.listeners:
+            listener.shoe_reset(self)
+            for code in self.shoe[:position]:
+                listener.card_drawn(code)
+
     def draw_card(self):
         """
-        Get the first card from the pack
+        Get the next card code from the pack
         The card is removed from the pack
         """
-        return self.card_deck.pop(0)
+        code = self.shoe[self.position]
+        self.position += 1
+        if self.listeners:
+            for listener in self.listeners:
+                listener.card_drawn(code)
+        return code
+
+
+Deck.cards = tuple(Card(name, suite, value)
+                   for name, value in Deck.card_names
+                   for suite in Deck.card_suites)
+Deck.ace = Deck.cards[Deck.ace_rank * len(Deck.card_suites)]
+Deck.card_values = [Deck.ace.value[0] if name == Deck.ace_card else value
+                    for name, value in Deck.card_names
+                    for suite in Deck.card_suites]
@@ -1,36 +1,59 @@
-import logging
 import time
+import logging
 
 from blackjack.deck import Deck
 from blackjack.player import Dealer
-from blackjack.util import delay
+from blackjack import pacing
+from blackjack.util import delay, log_and_print, output_enabled
 from blackjack.game_outcome import game_outcome
+from blackjack.ledger import POT
+from blackjack import latency as phases
 from blackjack.registered_players import Players
 
 log = logging.getLogger("game")
 
 
-def log_and_print(msg, log_f=logging.info, end='\n'):
-    log_f(msg)
-    print(msg, end=end)
-
-
 class Game:
-    def __init__(self, players_file):
+    def __init__(self, players_file=None, players=None, rng=None, seats=4,
+                 decks=1, penetration=None, pool=None, journal=None,
+                 ledger=None, latency=None):
         """
         A new game
             - registered players are taken from input file
+              (or given directly as `Player` objects for headless games)
             - dealer gets 1000
-            - a new fresh deck
-            - deck is shuffled
+            - a new fresh shoe of `decks` packs
+            - shoe is shuffled (or taken already shuffled from `pool`)
+
+        penetration - fraction of the shoe dealt before reshuffling
+        pool        - `ShoePool` with shoes of `decks` packs
+        journal     - `JournalWriter` recording every round
+        ledger      - `Ledger` keeping the books, checked every round
+        latency     - `Latency` timing the phases of every round
         """
-        self.players = Players(players_file)
+        if pool is not None and pool.decks != decks:
+            raise ValueError('The shoe pool has shoes of %d decks, not %d' %
+                             (pool.decks, decks))
+        self.players = Players(players_file, players, seats)
         self.dealer = Dealer(1000)
-        self.deck = Deck()
+        self.pool = pool
+        self.journal = journal
+        self.ledger = ledger
+        self.latency = latency
+        # timestamps of the round's start and of the last phase's end
+        self.__round_start = 0
+        self.__last_lap = 0
+        self.deck = Deck(rng, decks, penetration)
         self.deck.log()
-        self.deck.shuffle()
+        if pool is not None:
+            self.deck.load(pool.get())
+        else:
+            self.deck.shuffle()
         self.deck.log()
         self.rounds_played = 0
+        # for the metrics
+        self.hands_played = 0
+        self.reshuffles = 0
         self.total_bets = 0
         self.__outcome = game_outcome(self)
 
@@ -38,24 +61,82 @@ class Game:
         """
         Game main
         """
+        # bets and first hand
+        self.begin_round()
+        # ask each player - (h)it or (s)tand?
+        self.__players()
+        # dealer, outcome and results
+        self.end_round()
+        # reset for a new game
+        self.reset()
+
+    def begin_round(self):
+        """
+        First part of the round - before the players' turn
+        """
+        if self.latency is not None:
+            self.__round_start = self.__last_lap = time.perf_counter_ns()
+        if self.journal is not None:
+            self.journal.start_round(self)
+        self.hands_played += len(self.players.players)
         # set the bets
         self.__set_bets()
+        self.__lap(phases.BETS)
         # deal cards
         self.__deal_first_hand()
+        self.__lap(phases.DEAL)
         # log current game state
         self.log()
-        # ask each player - (h)it or (s)tand?
-        self.__players()
+        self.__lap(phases.LOG)
+
+    def play(self, player, answer):
+        """
+        Play the (h)it or (s)tand `answer` of `player`
+        Return: True if the player's turn is over
+        """
+        # hit
+        if answer == 'h':
+            return self.hit(player) == -1
+        # stand
+        if answer == 's':
+            self.stand(player)
+            return True
+        return False
+
+    def end_round(self):
+        """
+        Last part of the round - after the players' turn
+        The hands are kept until `reset`
+        """
+        self.__lap(phases.PLAYERS)
         # dealer's turn
         self.__dealer()
+        self.__lap(phases.DEALER)
         # game's outcome
         self.__outcome.get()
+        # check the books
+        if self.ledger is not None:
+            self.ledger.commit([self.dealer] + self.players.players)
+        self.__lap(phases.OUTCOME)
         # see who's broke
         self.__check_players_for_money()
+        self.__lap(phases.MONEY)
         # show the round's results
         self.__show_outcome()
-        # reset for a new game
-        self.__reset()
+        self.__lap(phases.SHOW)
+        # record the round
+        if self.journal is not None:
+            self.journal.end_round(self)
+        self.__lap(phases.JOURNAL)
+
+    def __lap(self, phase):
+        """
+        Time the `phase` that just ended
+        """
+        if self.latency is not None:
+            now = time.perf_counter_ns()
+            self.latency.record(phase, now - self.__last_lap)
+            self.__last_lap = now
 
     def __deal_first_hand(self):
         """
@@ -86,27 +167,43 @@ class Game:
         Ask all the players to place their bets
         """
         log.debug('Setting bets...')
+        ledger = self.ledger
+        if ledger is not None:
+            # open the dealer's account before any money moves
+            ledger.account(self.dealer)
         for player in self.players.players:
-            self.total_bets += player.bet()
+            if ledger is None:
+                self.total_bets += player.bet()
+                continue
+            account = ledger.account(player)
+            bet_value = player.bet()
+            ledger.transfer(account, POT, bet_value)
+            self.total_bets += bet_value
 
     def hit(self, player):
         card = self.deck.draw_card()
         player.draw_card(card)
+        verbose = output_enabled()
 
-        log_and_print('\t\t>> %s drew a card - [%s]' %
-                      (player.nume, str(card)))
+        if verbose:
+            log_and_print('\t\t>> %s drew a card - [%s]' %
+                          (player.nume, str(Deck.card(card))))
 
-        if(player.get_cards_sum() == 21):
+        if player.blackjack and verbose:
             log_and_print('\t\t>> %s ' % (player.display_name()))
 
-        if(player.get_cards_sum() > 21):
+        if player.busted:
             player.lost = True
-            log_and_print('\t\t>> %s is done' % (player.display_name()))
+            if verbose:
+                log_and_print('\t\t>> %s is done' %
+                              (player.display_name()))
             return -1
 
         return 0
 
     def stand(self, player):
+        if not output_enabled():
+            return
         log_and_print('\t\t>> %s stands [sum=%d]' %
                       (player.display_name(), player.get_cards_sum()))
         log_and_print('-' * 80)
@@ -123,16 +220,29 @@ class Game:
                 msg = "\nShall we begin a game?  (Y)es or (N)o: "
             answer = input(msg).lower()
         if answer == 'y':
-            self.rounds_played += 1
-            # check if we need a new deck
-            self.__new_deck()
+            self.start_round()
 
         return answer == 'y'
 
+    def start_round(self):
+        """
+        Prepare a new round - no questions asked
+        """
+        self.rounds_played += 1
+        # check if we need a new deck
+        if self.latency is None:
+            self.__new_deck()
+            return
+        start = time.perf_counter_ns()
+        self.__new_deck()
+        self.latency.record(phases.SHOE, time.perf_counter_ns() - start)
+
     def log(self):
         """
         Log current game state
         """
+        if not output_enabled():
+            return
         # header
         log_and_print('')
         log.debug('-' * 80)
@@ -163,19 +273,20 @@ class Game:
         """
         Return True if everyone lost :(
         """
-        return (self.dealer.lost and
-                len(self.players.get_losers()) == len(self.players.get()))
+        return self.dealer.lost and self.players.all_lost()
 
     def __all_players_lost(self):
         """
         Return True if all players lost lost :(
         """
-        return (len(self.players.get_losers()) == len(self.players.get()))
+        return self.players.all_lost()
 
     def __show_outcome(self):
         """
         Log current round's status
         """
+        if not output_enabled():
+            return
         # header
         log_and_print('')
         log.debug('-' * 80)
@@ -234,14 +345,19 @@ class Game:
 
     def __new_deck(self):
         """
-        Use a fresh shuffled pack of cards if there aren't enough cards left
+        Use a fresh shuffled shoe if the cut card was reached or if there
+        aren't enough cards left
 
         `Enough cards` are defined randomly when each player plus the dealer
         can get 5 cards 5*(np + 1)
         """
-        if len(self.deck.card_deck) < (len(self.players.players) + 1) * 5:
-            self.deck.__init__()
-            self.deck.shuffle()
+        if self.deck.needs_shuffle((len(self.players.players) + 1) * 5):
+            self.reshuffles += 1
+            if self.pool is not None:
+                self.pool.recycle(self.deck.load(self.pool.get()))
+            else:
+                self.deck.reset()
+                self.deck.shuffle()
             self.deck.log()
 
     def __dealer(self):
@@ -255,7 +371,7 @@ class Game:
             return
 
         while True:
-            time.sleep(0.1)
+            pacing.sleep(0.1)
             s = self.dealer.get_cards_sum()
             # stop only if more than 17
             if s > 17:
@@ -269,21 +385,10 @@ class Game:
         Ask each player if they want another card or not
         """
         for player in self.players.players:
-            log.debug('     player %s turn' % player.nume)
-            while True:
-                answer = ' '
-                while answer != 'h' and answer != 's':
-                    answer = input('%s : (h)it or (s)tand? ' %
-                                   player.display_name()).lower()
-                # hit
-                if answer == 'h':
-                    if self.hit(player) == -1:
-                        break
-                    continue
-                # stand
-                if answer == 's':
-                    self.stand(player)
-                    break
+            log.debug('     player %s turn', player.nume)
+            while not self.play(player,
+                                player.strategy.decide(player, self.dealer)):
+                pass
 
     def __check_players_for_money(self):
         """
@@ -294,9 +399,15 @@ class Game:
                 self.players.broke(player)
         self.players.remove_broke_players_from_game()
 
-    def __reset(self):
+    def reset(self):
         """
         Reset internal objects state for a new round
         """
         self.players.reset_for_new_game()
         self.dealer.reset_for_new_game()
+        # a round was timed since the last reset
+        if self.latency is not None and self.__round_start:
+            self.__lap(phases.RESET)
+            self.latency.record(phases.ROUND,
+                                self.__last_lap - self.__round_start)
+            self.__round_start = 0
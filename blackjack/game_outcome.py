@@ -1,11 +1,9 @@
 import logging
 
-log = logging.getLogger("outcome")
-
+from blackjack.util import log_and_print
+from blackjack.ledger import CASINO, POT
 
-def log_and_print(msg, log_f=logging.info, end='\n'):
-    log_f(msg)
-    print(msg, end=end)
+log = logging.getLogger("outcome")
 
 
 class game_outcome:
@@ -13,107 +11,85 @@ class game_outcome:
         self.game = game
         self.sum_dealer = 0
 
-    def __dealer_wins(self, player):
-        """
-        Dealer has a winner hand against `player`
-            - dealer gets the player's bet
-            - remove the bet value from the total bets
-        """
-        self.game.dealer.bet_won(player.bet_value)
-        self.game.total_bets -= player.bet_value
-
-    def __player_wins(self, player):
-        """
-        `player` wins the bet
-            - player gets twice its betted amount
-            - remove the bet value from the total bets
-            - dealer loses the player's bet value
-        """
-        # player wins - 1:1
-        player.bet_won()
-        # remove money from the dealer
-        self.game.dealer.bet_lost(player.bet_value)
-        # remove money from the total bets
-        self.game.total_bets -= player.bet_value
-
-    def __draw(self, player):
-        """
-        It's a draw
-        """
-        player.draw()
-        # remove money from the total bets
-        self.game.total_bets -= player.bet_value
-
     def __all_players_over_21(self):
         """
-        All players have results over 21
+        All players have results over 21 - the dealer takes all the bets
+        (the dealer didn't even draw)
         """
         log_and_print(' > All players lost')
-        # the dealer lost -- should not happen in this case
-        if self.sum_dealer > 21:
-            log_and_print(' > Dealer lost')
-            log_and_print('  --Everybody lost-- ')
-            for player in self.game.players.players:
-                self.__draw(player)
-        # dealer won
-        else:
-            log_and_print(' > Dealer WINS!!!')
-            self.game.dealer.bet_won(self.game.total_bets)
-            self.game.total_bets = 0
-
-    def __dealer_lost(self):
-        """
-        Dealer went over 21
-        """
-        winners = self.game.players.get_winners()
-        for player in winners:
-            self.__player_wins(player)
-
-        # remaining players lost
-        for player in self.game.players.get():
-            if player not in winners:
-                player.lost = True
+        log_and_print(' > Dealer WINS!!!')
 
-    def __determine_winner(self):
+    def __settle(self, player):
         """
-        All have their score <= 21
-        Determine the winner(s)
+        Resolve `player`'s hand against the dealer's
+        Return: how much of the bet goes back to the player (0, the bet or
+        twice the bet)
         """
-        for player in self.game.players.get_winners():
-            sum_player = player.get_cards_sum()
-            # dealer wins
-            if sum_player < self.sum_dealer:
-                log_and_print(' > Dealer beats %s' % player.nume)
-                self.__dealer_wins(player)
-                player.lost = True
-            # player wins
-            elif sum_player > self.sum_dealer:
-                log_and_print(' > %s wins %d' %
-                              (player.nume, player.bet_value))
-                self.__player_wins(player)
-            # draw
-            else:
-                log_and_print(' > draw')
-                self.__draw(player)
+        dealer = self.game.dealer
+        ledger = self.game.ledger
+        bet_value = player.bet_value
+        # over 21 - the bet stays in the pot, for the dealer
+        if player.lost:
+            return 0
+        self.game.total_bets -= bet_value
+        sum_player = player.cards_sum
+        # dealer wins
+        if self.sum_dealer <= 21 and sum_player < self.sum_dealer:
+            log_and_print(' > Dealer beats %s' % player.nume)
+            dealer.bet_won(bet_value)
+            player.lost = True
+            if ledger is not None:
+                ledger.transfer(POT, ledger.account(dealer), bet_value)
+            return 0
+        # player wins - 1:1
+        if self.sum_dealer > 21 or sum_player > self.sum_dealer:
+            if self.sum_dealer <= 21:
+                log_and_print(' > %s wins %d' % (player.nume, bet_value))
+            jetoane = dealer.jetoane
+            dealer.bet_lost(bet_value)
+            if ledger is not None:
+                account = ledger.account(player)
+                ledger.transfer(POT, account, bet_value)
+                ledger.transfer(ledger.account(dealer), account, bet_value)
+                # the dealer borrowed from the casino
+                borrowed = dealer.jetoane - (jetoane - bet_value)
+                if borrowed:
+                    ledger.transfer(CASINO, ledger.account(dealer), borrowed)
+            return 2 * bet_value
+        # draw
+        log_and_print(' > draw')
+        if ledger is not None:
+            ledger.transfer(POT, ledger.account(player), bet_value)
+        return bet_value
 
     def get(self):
         """
         Get the outcome of the game
+
+        Every seat is resolved against the dealer in one pass; the dealer's
+        money changes in seat order (so it borrows at the same moment) and
+        the players' bankrolls are written at the end, all at once
         """
         self.sum_dealer = self.game.dealer.get_cards_sum()
-        losers = self.game.players.get_losers()
+        players = self.game.players.players
 
-        # all players lost
-        if len(losers) == len(self.game.players.players):
+        over_21 = 0
+        payouts = []
+        for player in players:
+            over_21 += player.lost
+            payouts.append(self.__settle(player))
+        if over_21 == len(players):
             self.__all_players_over_21()
-        # check for a winner (player(s) or dealer)
-        # if dealer lost just pick the highest form the players
-        elif self.sum_dealer > 21:
-            self.__dealer_lost()
-        else:
-            self.__determine_winner()
 
-        # any remaining bets go to the dealer
+        for player, payout in zip(players, payouts):
+            if payout:
+                log.debug('Player %s gets %d', player.nume, payout)
+                player.jetoane += payout
+
+        # any remaining bets (the players over 21) go to the dealer
         self.game.dealer.bet_won(self.game.total_bets)
-        # update the losers list
-        losers = self.game.players.get_losers()
+        if self.game.ledger is not None and self.game.total_bets:
+            self.game.ledger.transfer(
+                POT, self.game.ledger.account(self.game.dealer),
+                self.game.total_bets)
+        self.game.total_bets = 0
@@ -0,0 +1,234 @@
+"""
+Binary round journal
+
+An append-only file of fixed-width records, one for the dealer and one for
+each seat, for every round played:
+
+    round       round number (`Game.rounds_played`)
+    shoe_pos    position in the shoe when the round started
+    player      player id (order of first appearance), DEALER for the dealer
+    cards       codes of the cards in the hand, in the order they were dealt
+    hits        number of cards asked for after the first hand
+    flags       STOOD / BUSTED / LOST / BORROWED
+    bet         amount bet
+    delta       bankroll change over the round
+    jetoane     bankroll at the end of the round
+
+Every run that writes to the journal (a new one or appending to an old
+one) starts with a SESSION record (player SESSION, everything else 0): the
+round numbers and the player ids start again in each session.
+
+The reader maps the file in memory and unpacks the records directly - no
+text parsing
+"""
+import os
+import mmap
+import struct
+import logging
+import collections
+
+log = logging.getLogger("journal")
+
+MAGIC = b'BJJ1'
+# 1 - no sessions, 2 - a SESSION record at the start of every run,
+# 3 - 64 bit money and 32 bit shoe positions
+VERSION = 3
+HEADER = struct.Struct('<4sHH')
+# a hand can't have more than 22 cards: 21 cards worth 1, then one more
+MAX_CARDS = 22
+RECORD = struct.Struct('<IIHB%dsBBqqq' % MAX_CARDS)
+# the biggest bankroll that fits in a record, with room for the winnings
+MAX_JETOANE = 2 ** 62
+
+DEALER = 0xFFFF
+SESSION = 0xFFFE
+
+# flags
+STOOD = 1
+BUSTED = 2
+LOST = 4
+BORROWED = 8
+
+JournalRecord = collections.namedtuple(
+    'JournalRecord',
+    'round shoe_pos player cards hits flags bet delta jetoane')
+
+
+class JournalWriter:
+    def __init__(self, path):
+        """
+        Open the journal `path` for appending - it's created if needed
+        A new session is started in it
+        Raise: ValueError if `path` is a journal of another version
+        """
+        self.path = path
+        new_file = not os.path.exists(path) or os.path.getsize(path) == 0
+        if not new_file:
+            with open(path, 'rb') as f:
+                header = f.read(HEADER.size)
+            if (len(header) < HEADER.size or
+                    HEADER.unpack(header) != (MAGIC, VERSION, RECORD.size)):
+                raise ValueError('%s is not a round journal of version %d,'
+                                 ' it can\'t be appended to' %
+                                 (path, VERSION))
+        self.file = open(path, 'ab', buffering=1 << 20)
+        if new_file:
+            self.file.write(HEADER.pack(MAGIC, VERSION, RECORD.size))
+        self.file.write(RECORD.pack(0, 0, SESSION, 0, b'', 0, 0, 0, 0, 0))
+        self.player_ids = {}
+        self.__round = None
+
+    def player_id(self, player):
+        """
+        Return: the journal id of `player` - given in order of appearance
+        """
+        return self.player_ids.setdefault(id(player), len(self.player_ids))
+
+    def start_round(self, game):
+        """
+        Remember the state at the start of the round (before the bets)
+        """
+        self.__round = (game.deck.position, game.dealer.jetoane,
+                        [(player, player.jetoane)
+                         for player in game.players.players])
+
+    def end_round(self, game):
+        """
+        Write the records of the round that just ended (before the reset)
+        """
+        shoe_pos, dealer_jetoane, seats = self.__round
+        dealer = game.dealer
+        flags = self.__flags(dealer)
+        if dealer.jetoane != dealer_jetoane + dealer.balance:
+            flags |= BORROWED
+        self.__write(game.rounds_played, shoe_pos, DEALER, dealer, flags, 0,
+                     dealer.jetoane - dealer_jetoane)
+        for player, jetoane in seats:
+            self.__write(game.rounds_played, shoe_pos,
+                         self.player_id(player), player,
+                         self.__flags(player), player.bet_value,
+                         player.jetoane - jetoane)
+        self.__round = None
+
+    def __flags(self, player):
+        flags = BUSTED if player.busted else STOOD
+        if player.lost:
+            flags |= LOST
+        return flags
+
+    def __write(self, round, shoe_pos, player_id, player, flags, bet, delta):
+        hand = player.current_hand
+        # the dealer starts with one card, the players with two
+        first_hand = 1 if player_id == DEALER else 2
+        self.file.write(RECORD.pack(
+            round, shoe_pos, player_id, len(hand), bytes(hand),
+            max(0, len(hand) - first_hand), flags, bet, delta,
+            player.jetoane))
+
+    def flush(self):
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+
+class JournalReader:
+    def __init__(self, path):
+        """
+        Map the journal `path` in memory
+        """
+        self.path = path
+        self.file = open(path, 'rb')
+        self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, record_size = HEADER.unpack_from(self.map)
+        if magic != MAGIC:
+            raise ValueError('%s is not a round journal' % path)
+        if version != VERSION or record_size != RECORD.size:
+            raise ValueError('%s is a round journal of version %d, only'
+                             ' version %d can be read' %
+                             (path, version, VERSION))
+        # ignore a record cut in half (the writer was killed)
+        self.records_count = (len(self.map) - HEADER.size) // RECORD.size
+        self.__end = HEADER.size + self.records_count * RECORD.size
+
+    def __len__(self):
+        return self.records_count
+
+    def raw_records(self):
+        """
+        Iterate over the records as plain tuples, cards not trimmed
+        - the fastest way to scan the journal
+        """
+        view = memoryview(self.map)[HEADER.size:self.__end]
+        try:
+            yield from RECORD.iter_unpack(view)
+        finally:
+            view.release()
+
+    def records(self):
+        """
+        Iterate over the records as `JournalRecord` - the SESSION records
+        included
+        """
+        for (round, shoe_pos, player, ncards, cards, hits, flags,
+             bet, delta, jetoane) in self.raw_records():
+            yield JournalRecord(round, shoe_pos, player, cards[:ncards],
+                                hits, flags, bet, delta, jetoane)
+
+    def rounds(self):
+        """
+        Iterate over the rounds: (session, round number, [JournalRecord])
+        with the dealer's record first
+        session - number of the run that played the round: 1 for the
+                  first one (0 in the journals without sessions)
+        """
+        session = 0
+        current = None
+        records = []
+        for record in self.records():
+            if record.player in (DEALER, SESSION) and records:
+                yield session, current, records
+                records = []
+            if record.player == SESSION:
+                session += 1
+                continue
+            current = record.round
+            records.append(record)
+        if records:
+            yield session, current, records
+
+    def sessions(self):
+        """
+        Return: the number of sessions in the journal
+        """
+        return sum(1 for record in self.raw_records()
+                   if record[2] == SESSION)
+
+    def to_numpy(self):
+        """
+        Return: the records as a numpy structured array (no copy) - the
+        SESSION records included
+        The array maps the file on its own, so it stays valid after the
+        reader is closed
+        """
+        import numpy as np
+        dtype = np.dtype([('round', '<u4'), ('shoe_pos', '<u4'),
+                          ('player', '<u2'), ('ncards', 'u1'),
+                          ('cards', 'u1', MAX_CARDS), ('hits', 'u1'),
+                          ('flags', 'u1'), ('bet', '<i8'), ('delta', '<i8'),
+                          ('jetoane', '<i8')])
+        if self.records_count == 0:
+            # an empty file can't be mapped
+            return np.zeros(0, dtype=dtype)
+        return np.memmap(self.path, dtype=dtype, mode='r',
+                         offset=HEADER.size, shape=(self.records_count,))
+
+    def close(self):
+        self.map.close()
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
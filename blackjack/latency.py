@@ -0,0 +1,113 @@
+"""
+Round latency
+
+How long each phase of a round takes, in histograms with fixed buckets
+(1us to 10s, 1-2-5 steps): a sample only increments a few counters, the
+histograms never grow. The phases, in the order `Game` goes through them:
+    shoe                - `start_round`: the reshuffles (the cut card, the
+                          shoe pool) - not part of the round
+    bets, deal, log     - `begin_round`
+    players             - the players' turn (the console / the network
+                          included)
+    dealer, outcome, money, show, journal - `end_round`
+    reset               - up to the end of `reset` (the server sends the
+                          results in between)
+    round               - the whole round, bets to reset
+
+One `Latency` can be shared by many games (the tables of a server) - each
+game keeps its own timestamps. `dump` / `dump_at_exit` save it as JSON
+"""
+import json
+import array
+import atexit
+import bisect
+import logging
+
+log = logging.getLogger("latency")
+
+PHASES = ('shoe', 'bets', 'deal', 'log', 'players', 'dealer', 'outcome',
+          'money', 'show', 'journal', 'reset', 'round')
+SHOE, BETS, DEAL, LOG, PLAYERS, DEALER, OUTCOME, MONEY, SHOW, JOURNAL, \
+    RESET, ROUND = range(len(PHASES))
+
+# upper bound of each bucket, in nanoseconds - the last bucket is open
+BOUNDS = tuple(step * 10 ** power for power in range(3, 11)
+               for step in (1, 2, 5))[:-2]
+
+
+class Histogram:
+    def __init__(self):
+        self.counts = array.array('Q', [0]) * (len(BOUNDS) + 1)
+        self.count = 0
+        self.total = 0
+        self.max = 0
+
+    def record(self, ns):
+        self.counts[bisect.bisect_left(BOUNDS, ns)] += 1
+        self.count += 1
+        self.total += ns
+        if ns > self.max:
+            self.max = ns
+
+    def percentile(self, fraction):
+        """
+        Return: the upper bound of the bucket with the `fraction` sample
+        (in ns - the max for the open bucket)
+        """
+        wanted = fraction * self.count
+        seen = 0
+        for i, count in enumerate(self.counts):
+            seen += count
+            if count and seen >= wanted:
+                return BOUNDS[i] if i < len(BOUNDS) else self.max
+        return 0
+
+    def summary(self):
+        """
+        Return: dict with the count, mean / p50 / p99 / max (microseconds)
+        and the non empty buckets - [upper bound in us (None - open), count]
+        """
+        mean = self.total / self.count if self.count else 0
+        return {
+            'count': self.count,
+            'mean_us': mean / 1000,
+            'p50_us': self.percentile(0.5) / 1000,
+            'p99_us': self.percentile(0.99) / 1000,
+            'max_us': self.max / 1000,
+            'buckets': [[BOUNDS[i] / 1000 if i < len(BOUNDS) else None,
+                         count]
+                        for i, count in enumerate(self.counts) if count],
+        }
+
+
+class Latency:
+    def __init__(self):
+        self.histograms = [Histogram() for phase in PHASES]
+
+    def record(self, phase, ns):
+        self.histograms[phase].record(ns)
+
+    def summary(self):
+        return {name: histogram.summary()
+                for name, histogram in zip(PHASES, self.histograms)}
+
+    def __str__(self):
+        fmt = ' %8s | %10s | %10s | %10s | %10s | %10s'
+        lines = [fmt % ('Phase', 'Count', 'Mean us', 'p50 us', 'p99 us',
+                        'Max us'), '-' * 70]
+        for name, histogram in zip(PHASES, self.histograms):
+            summary = histogram.summary()
+            lines.append(fmt % (name, summary['count'],
+                                '%.1f' % summary['mean_us'],
+                                '%.0f' % summary['p50_us'],
+                                '%.0f' % summary['p99_us'],
+                                '%.0f' % summary['max_us']))
+        return '\n'.join(lines)
+
+    def dump(self, json_file):
+        with open(json_file, 'w') as f:
+            json.dump(self.summary(), f, indent=2)
+        log.info('Latency histograms saved in %s' % json_file)
+
+    def dump_at_exit(self, json_file):
+        atexit.register(self.dump, json_file)
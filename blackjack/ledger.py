@@ -0,0 +1,147 @@
+"""
+Bankroll ledger
+
+Double-entry book of all the money moved by a `Game`. Each transfer is one
+compact entry (from account, to account, amount) in three arrays; the
+accounts are:
+    CASINO  - money from outside the table: the opening bankrolls and what
+              the dealer borrows
+    POT     - the bets on the table
+    the dealer and each player, opened the first time they're seen
+
+During a round the transfers are only recorded. `commit` applies them to
+the balances, all at once, and checks the book against the table:
+    - every account's balance is the holder's `jetoane` (O(seats))
+    - the pot is empty
+Any difference raises `LedgerError`. Each entry takes from one account what
+it gives to another, so the balances always add up to 0 (the casino being
+negative) - money can't appear or disappear without being caught
+
+Only the game may move the money of the holders: changing `jetoane` from
+outside shows up as a difference at the next `commit`
+"""
+import array
+import logging
+
+log = logging.getLogger("ledger")
+
+CASINO = 0
+POT = 1
+
+
+class LedgerError(Exception):
+    pass
+
+
+class Ledger:
+    def __init__(self, history=True):
+        """
+        history - keep the committed entries (False - only the balances)
+        """
+        self.history = history
+        self.names = ['casino', 'pot']
+        self.balances = array.array('q', [0, 0])
+        self.src = array.array('I')
+        self.dst = array.array('I')
+        self.amount = array.array('q')
+        # entries [0, committed) are already in the balances
+        self.committed = 0
+        self.rounds = 0
+        self.__accounts = {}
+
+    def __len__(self):
+        return len(self.amount)
+
+    def account(self, holder):
+        """
+        Return: the account of `holder` (dealer / player) - a new one is
+        opened, with its current `jetoane`, the first time
+        """
+        account = self.__accounts.get(holder)
+        if account is None:
+            account = len(self.balances)
+            self.__accounts[holder] = account
+            self.names.append(holder.nume)
+            self.balances.append(holder.jetoane)
+            self.balances[CASINO] -= holder.jetoane
+        return account
+
+    def transfer(self, src, dst, amount):
+        """
+        Record a transfer between two accounts - applied by `commit`
+        """
+        self.src.append(src)
+        self.dst.append(dst)
+        self.amount.append(amount)
+
+    def balance(self, account):
+        """
+        Return: the committed balance of `account`
+        """
+        return self.balances[account]
+
+    def commit(self, holders):
+        """
+        Apply the round's transfers and check the book against `holders`
+        (the dealer and the seated players)
+        """
+        balances = self.balances
+        src, dst, amount = self.src, self.dst, self.amount
+        for i in range(self.committed, len(amount)):
+            balances[src[i]] -= amount[i]
+            balances[dst[i]] += amount[i]
+        if self.history:
+            self.committed = len(amount)
+        else:
+            del src[:], dst[:], amount[:]
+            self.committed = 0
+        self.rounds += 1
+
+        errors = []
+        if balances[POT] != 0:
+            errors.append('%d left in the pot' % balances[POT])
+        for holder in holders:
+            account = self.account(holder)
+            if balances[account] != holder.jetoane:
+                errors.append('%s has %d, the ledger says %d' %
+                              (holder.nume, holder.jetoane,
+                               balances[account]))
+        if errors:
+            raise LedgerError('Round %d: %s' % (self.rounds,
+                                                '; '.join(errors)))
+
+    def snapshot(self):
+        """
+        Return: the committed state - see `restore`
+        """
+        return (self.balances[:], self.committed, self.rounds,
+                len(self.names))
+
+    def restore(self, snapshot):
+        """
+        Go back to a `snapshot`; the entries recorded since then are
+        dropped (when the history is kept) and so are the accounts opened
+        """
+        balances, committed, rounds, accounts = snapshot
+        self.balances = balances[:]
+        if self.history:
+            del self.src[committed:], self.dst[committed:]
+            del self.amount[committed:]
+            self.committed = committed
+        else:
+            del self.src[:], self.dst[:], self.amount[:]
+            self.committed = 0
+        self.rounds = rounds
+        del self.names[accounts:]
+        self.__accounts = {holder: account
+                           for holder, account in self.__accounts.items()
+                           if account < accounts}
+
+    def entries(self):
+        """
+        Yield: (from, to, amount) of the recorded entries, with the names
+        of the accounts
+        """
+        names = self.names
+        for src, dst, amount in zip(self.src, self.dst, self.amount):
+            yield names[src], names[dst], amount
@@ -0,0 +1,248 @@
+"""
+Multi-table lobby
+
+All the registered players get a seat: they are spread over as many tables
+as needed (at most `max_tables`), the others wait in the lobby. Every time
+players go broke at a table, their seats are given to the players waiting
+
+Each table is a headless `Game` played by a pool of processes (one per CPU
+by default), so the tables really play at the same time. Every table gets
+its own first players; the players waiting after them are in a queue
+shared by all the tables. The roster is read as the lobby goes: the tables
+are handed to the processes a few at a time and the queue is kept filled
+with chunks of players, not the whole roster at once
+"""
+import os
+import copy
+import queue
+import random
+import time
+import collections
+import logging
+import multiprocessing
+import concurrent.futures
+
+from blackjack.game import Game
+from blackjack.player import Player
+from blackjack.roster import Roster
+from blackjack.util import headless
+from blackjack.rng import SeededRandom
+
+log = logging.getLogger("lobby")
+
+# players put in the waiting queue at once
+CHUNK = 256
+
+
+class TableResult:
+    """
+    What happened at one table
+    """
+    def __init__(self, table):
+        self.table = table
+        self.rounds = 0
+        self.hands = 0
+        self.elapsed = 0.0
+        # (nume, jetoane) of the players still at the table at the end
+        self.seated = []
+        # names of the players who went broke at the table
+        self.broke = []
+        # players taken from the waiting queue but never seated
+        self.unseated = 0
+
+
+class LobbyResult:
+    def __init__(self, tables):
+        self.tables = tables
+        self.elapsed = 0.0
+        self.waiting = 0
+
+    def rounds(self):
+        return sum(table.rounds for table in self.tables)
+
+    def hands(self):
+        return sum(table.hands for table in self.tables)
+
+    def hands_per_second(self):
+        if self.elapsed == 0:
+            return 0.0
+        return self.hands() / self.elapsed
+
+    def __str__(self):
+        fmt = ' %6s | %10s | %10s | %8s | %8s'
+        lines = [
+            ' Tables: %d  Rounds: %d  Hands: %d' % (
+                len(self.tables), self.rounds(), self.hands()),
+            ' Elapsed: %.3fs  [%.0f hands/s]' % (self.elapsed,
+                                                 self.hands_per_second()),
+            ' Players still waiting for a seat: %d' % self.waiting,
+            '',
+            fmt % ('Table', 'Rounds', 'Hands', 'Seated', 'Broke'),
+            '-' * 56,
+        ]
+        for table in self.tables:
+            lines.append(fmt % (table.table + 1, table.rounds, table.hands,
+                                len(table.seated), len(table.broke)))
+        return '\n'.join(lines)
+
+
+def _new_players(fields, strategy):
+    return [Player(*player, strategy=copy.copy(strategy))
+            for player in fields]
+
+
+def _take_seats(waiting, reserve, count, strategy, wait=False):
+    """
+    Return: at most `count` players, from `reserve` (the fields of the
+    players taken from the `waiting` queue and not seated yet) and then
+    from the queue, a chunk at a time
+    wait - block until a player comes (or the queue says none will)
+    """
+    players = []
+    while len(players) < count:
+        if not reserve:
+            try:
+                if wait and not players:
+                    chunk = waiting.get()
+                else:
+                    chunk = waiting.get_nowait()
+            except queue.Empty:
+                break
+            if chunk is None:
+                # no more players - leave the mark for the other tables
+                waiting.put(None)
+                break
+            reserve.extend(chunk)
+        players.append(Player(*reserve.popleft(),
+                              strategy=copy.copy(strategy)))
+    return players
+
+
+def _run_table(table, seats, n_rounds, seated, waiting, strategy, seed):
+    """
+    Worker - play `n_rounds` rounds at one table, starting with the
+    players in `seated` (their fields) and refilling the seats of the
+    players who went broke
+    """
+    result = TableResult(table)
+    reserve = collections.deque()
+    with headless():
+        start = time.perf_counter()
+        game = Game(players=_new_players(seated, strategy),
+                    rng=SeededRandom(seed), seats=seats)
+        for i in range(n_rounds):
+            if game.players_in_game() == 0:
+                # everybody went broke - wait for the next players
+                game.players.seat(_take_seats(waiting, reserve, seats,
+                                              strategy, wait=True))
+                if game.players_in_game() == 0:
+                    break
+            game.start_round()
+            result.hands += game.players_in_game()
+            game.run()
+            result.rounds += 1
+
+            # give the free seats to the players waiting
+            free_seats = seats - game.players_in_game()
+            if free_seats > 0:
+                result.broke.extend(player.nume
+                                    for player in game.players.broke_players)
+                game.players.seat(game.players.players +
+                                  _take_seats(waiting, reserve, free_seats,
+                                              strategy))
+        result.elapsed = time.perf_counter() - start
+    result.unseated = len(reserve)
+    result.seated = [(player.nume, player.jetoane)
+                     for player in game.players.players]
+    return result
+
+
+class Lobby:
+    def __init__(self, players_file, strategy, seats=4, max_tables=None):
+        """
+        players_file - all these players get a seat, sooner or later
+        strategy     - played by all the players (each gets a copy)
+        seats        - seats at each table
+        max_tables   - None - as many tables as needed to seat everyone
+        """
+        self.roster = Roster(players_file)
+        self.strategy = strategy
+        self.seats = seats
+        tables = -(-len(self.roster) // seats)
+        if max_tables is not None:
+            tables = min(tables, max_tables)
+        self.tables = max(1, tables)
+
+    def run(self, n_rounds, seed=None, workers=None):
+        """
+        Play `n_rounds` rounds at every table, all the tables at once
+        workers - number of processes, by default one per CPU (never more
+                  than the tables)
+        Return: LobbyResult
+        """
+        start = time.perf_counter()
+        rng = random.Random(seed)
+        if workers is None:
+            workers = os.cpu_count() or 1
+        workers = max(1, min(workers, self.tables))
+        log.info('%d players at %d tables of %d seats, %d processes' %
+                 (len(self.roster), self.tables, self.seats, workers))
+
+        # the first players of every table - a table that starts late
+        # doesn't find the queue emptied by the others
+        first = min(self.tables * self.seats, len(self.roster))
+        chunks = iter(range(first, len(self.roster), CHUNK))
+        tables = iter(range(self.tables))
+        results = [None] * self.tables
+        with multiprocessing.Manager() as manager:
+            waiting = manager.Queue()
+            with concurrent.futures.ProcessPoolExecutor(workers) as executor:
+                running = {}
+                while True:
+                    # a few tables ahead of the processes, not all of them
+                    while len(running) < 4 * workers:
+                        table = next(tables, None)
+                        if table is None:
+                            break
+                        seated = self.roster.fields(
+                            range(table * self.seats,
+                                  min((table + 1) * self.seats, first)))
+                        future = executor.submit(
+                            _run_table, table, self.seats, n_rounds,
+                            seated, waiting, self.strategy,
+                            rng.getrandbits(64))
+                        running[future] = table
+                    if not running:
+                        break
+                    # keep a few chunks of players in the queue
+                    while chunks is not None and \
+                            waiting.qsize() < 4 * workers:
+                        chunk = next(chunks, None)
+                        if chunk is None:
+                            # everybody's in the queue
+                            waiting.put(None)
+                            chunks = None
+                        else:
+                            waiting.put(self.roster.fields(
+                                range(chunk, min(chunk + CHUNK,
+                                                 len(self.roster)))))
+                    done, _ = concurrent.futures.wait(
+                        running, timeout=None if chunks is None else 0.1,
+                        return_when=concurrent.futures.FIRST_COMPLETED)
+                    for future in done:
+                        results[running.pop(future)] = future.result()
+
+            result = LobbyResult(results)
+            result.waiting = sum(table.unseated for table in results)
+            if chunks is not None:
+                result.waiting += sum(min(CHUNK, len(self.roster) - chunk)
+                                      for chunk in chunks)
+            while True:
+                try:
+                    chunk = waiting.get_nowait()
+                except queue.Empty:
+                    break
+                if chunk is not None:
+                    result.waiting += len(chunk)
+        result.elapsed = time.perf_counter() - start
+        return result
@@ -0,0 +1,155 @@
+"""
+Metrics endpoint
+
+A small HTTP server, on localhost, in a daemon thread, serving the state of
+the watched games in the Prometheus text format at /metrics:
+    blackjack_tables                    games watched
+    blackjack_rounds_total              `Game.rounds_played`
+    blackjack_hands_total               hands played
+    blackjack_hands_per_second          since the previous scrape
+    blackjack_reshuffles_total          new shoes (`Game.__new_deck`)
+    blackjack_dealer_borrows_total      the dealer borrowing from the casino
+    blackjack_broke_players_total       players who went broke
+    blackjack_phase_seconds             phase latencies (histogram), for
+                                        the games with a `Latency`
+
+A scrape only reads the counters the games keep anyway - it takes no lock
+the game loop could wait for
+"""
+import time
+import logging
+import threading
+import http.server
+
+from blackjack.latency import PHASES, BOUNDS
+
+log = logging.getLogger("metrics")
+
+PORT = 9021
+
+
+class _Handler(http.server.BaseHTTPRequestHandler):
+    # set by `MetricsServer`
+    metrics = None
+
+    def do_GET(self):
+        if self.path != '/metrics':
+            self.send_error(404)
+            return
+        body = self.metrics.render().encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        log.debug(format, *args)
+
+
+class MetricsServer:
+    def __init__(self, host='127.0.0.1', port=PORT):
+        self.host = host
+        self.port = port
+        self.games = []
+        self.__server = None
+        # hands per second between two scrapes
+        self.__lock = threading.Lock()
+        self.__last_scrape = time.perf_counter()
+        self.__last_hands = 0
+
+    def watch(self, game):
+        """
+        Export the metrics of `game` too
+        """
+        self.games.append(game)
+
+    def start(self):
+        """
+        Serve in a daemon thread - it stops with the program
+        Return: self
+        """
+        handler = type('Handler', (_Handler,), {'metrics': self})
+        self.__server = http.server.ThreadingHTTPServer((self.host, self.port),
+                                                        handler)
+        self.__server.daemon_threads = True
+        # port 0 - any free port
+        self.port = self.__server.server_address[1]
+        thread = threading.Thread(target=self.__server.serve_forever,
+                                  name='metrics', daemon=True)
+        thread.start()
+        log.info('Metrics on http://%s:%d/metrics' % (self.host, self.port))
+        return self
+
+    def close(self):
+        if self.__server is not None:
+            self.__server.shutdown()
+            self.__server.server_close()
+            self.__server = None
+
+    def __hands_per_second(self, hands):
+        with self.__lock:
+            now = time.perf_counter()
+            elapsed = now - self.__last_scrape
+            rate = (hands - self.__last_hands) / elapsed if elapsed else 0.0
+            self.__last_scrape = now
+            self.__last_hands = hands
+        return rate
+
+    def render(self):
+        """
+        Return: the metrics in the Prometheus text format
+        """
+        # the list may grow while we read it (new tables)
+        games = list(self.games)
+        hands = sum(game.hands_played for game in games)
+        lines = []
+
+        def metric(name, kind, help, value):
+            lines.append('# HELP %s %s' % (name, help))
+            lines.append('# TYPE %s %s' % (name, kind))
+            lines.append('%s %s' % (name, value))
+
+        metric('blackjack_tables', 'gauge', 'Games watched', len(games))
+        metric('blackjack_rounds_total', 'counter', 'Rounds played',
+               sum(game.rounds_played for game in games))
+        metric('blackjack_hands_total', 'counter', 'Hands played', hands)
+        metric('blackjack_hands_per_second', 'gauge',
+               'Hands played per second since the previous scrape',
+               '%.3f' % self.__hands_per_second(hands))
+        metric('blackjack_reshuffles_total', 'counter', 'New shoes',
+               sum(game.reshuffles for game in games))
+        metric('blackjack_dealer_borrows_total', 'counter',
+               'Times the dealer borrowed from the casino',
+               sum(game.dealer.borrows for game in games))
+        metric('blackjack_broke_players_total', 'counter',
+               'Players who went broke',
+               sum(game.players.went_broke for game in games))
+
+        # the same `Latency` can be shared by many games
+        latencies = {id(game.latency): game.latency for game in games
+                     if game.latency is not None}
+        if latencies:
+            name = 'blackjack_phase_seconds'
+            lines.append('# HELP %s Duration of the phases of the rounds'
+                         % name)
+            lines.append('# TYPE %s histogram' % name)
+            for phase, phase_name in enumerate(PHASES):
+                histograms = [latency.histograms[phase]
+                              for latency in latencies.values()]
+                seen = 0
+                for i, bound in enumerate(BOUNDS):
+                    seen += sum(h.counts[i] for h in histograms)
+                    lines.append('%s_bucket{phase="%s",le="%g"} %d' %
+                                 (name, phase_name, bound / 1e9, seen))
+                # the open bucket - counted from the buckets too, so that
+                # the histogram stays consistent while it's being filled
+                count = seen + sum(h.counts[len(BOUNDS)] for h in histograms)
+                lines.append('%s_bucket{phase="%s",le="+Inf"} %d' %
+                             (name, phase_name, count))
+                lines.append('%s_sum{phase="%s"} %.9f' %
+                             (name, phase_name,
+                              sum(h.total for h in histograms) / 1e9))
+                lines.append('%s_count{phase="%s"} %d' %
+                             (name, phase_name, count))
+        return '\n'.join(lines) + '\n'
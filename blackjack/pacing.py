@@ -0,0 +1,55 @@
+"""
+Game pacing
+
+All the waiting done by the game (the "animations", the dealer thinking)
+goes through the current clock, so it can be changed in one place:
+    - RealClock     really sleeps - the interactive game
+    - ScaledClock   sleeps `factor` times the requested time
+    - VirtualClock  never sleeps, only counts the time it would have slept
+                    - simulations, servers, tests
+"""
+import time
+
+
+class RealClock:
+    def sleep(self, seconds):
+        time.sleep(seconds)
+
+
+class ScaledClock:
+    def __init__(self, factor):
+        """
+        factor - 0.5 runs twice as fast, 2 twice as slow
+        """
+        self.factor = factor
+
+    def sleep(self, seconds):
+        if self.factor > 0:
+            time.sleep(seconds * self.factor)
+
+
+class VirtualClock:
+    def __init__(self):
+        # total number of seconds we should have slept
+        self.elapsed = 0.0
+
+    def sleep(self, seconds):
+        self.elapsed += seconds
+
+
+clock = RealClock()
+
+
+def set_clock(new_clock):
+    """
+    Use `new_clock` for all the pacing
+    Return: the previous clock, to be restored later
+    """
+    global clock
+    previous = clock
+    clock = new_clock
+    return previous
+
+
+def sleep(seconds):
+    clock.sleep(seconds)
@@ -0,0 +1,81 @@
+"""
+Parallel simulations
+
+The rounds are split into shards played by a pool of processes. Each shard
+gets its own seed, derived from the master seed, and sends back only its
+aggregated `SimulationResult`; the results are merged at the end
+
+The shards (and their seeds) don't depend on the number of processes, so
+the same master seed always gives the same results
+"""
+import os
+import time
+import random
+import logging
+import concurrent.futures
+
+from blackjack.simulation import SimulationResult, simulate
+
+log = logging.getLogger("parallel")
+
+
+def shard_seeds(seed, shards):
+    """
+    Return: one independent seed for each shard, derived from `seed`
+    """
+    rng = random.Random(seed)
+    return [rng.getrandbits(64) for i in range(shards)]
+
+
+def shard_rounds(n_rounds, shards):
+    """
+    Return: the number of rounds played by each shard
+    """
+    rounds, extra = divmod(n_rounds, shards)
+    return [rounds + (1 if shard < extra else 0) for shard in range(shards)]
+
+
+def _run_shard(engine, n_rounds, strategies, seed, options):
+    """
+    Worker - play one shard
+    """
+    if engine == 'numpy':
+        from blackjack.vectorized import simulate_vectorized
+        return simulate_vectorized(n_rounds, strategies, seed, **options)
+    return simulate(n_rounds, strategies, seed, **options)
+
+
+def simulate_parallel(n_rounds, strategies, seed=None, workers=None,
+                      shards=16, engine='game', **options):
+    """
+    Play `n_rounds` rounds split in `shards` shards over `workers` processes
+
+    seed    - master seed; None for a random one
+    workers - number of processes, by default one per CPU
+    engine  - 'game' for `simulate`, 'numpy' for `simulate_vectorized`
+    options - passed on to the engine (bankroll, decks, tables, ...)
+
+    Return: SimulationResult with the merged results of all the shards
+    """
+    if seed is None:
+        seed = random.SystemRandom().getrandbits(64)
+    if workers is None:
+        workers = os.cpu_count() or 1
+    shards = max(1, min(shards, n_rounds))
+    log.info('Playing %d rounds in %d shards on %d processes [seed=%d]' %
+             (n_rounds, shards, workers, seed))
+
+    result = SimulationResult(len(strategies))
+    start = time.perf_counter()
+    with concurrent.futures.ProcessPoolExecutor(workers) as executor:
+        futures = [executor.submit(_run_shard, engine, rounds, strategies,
+                                   shard_seed, options)
+                   for rounds, shard_seed in zip(
+                       shard_rounds(n_rounds, shards),
+                       shard_seeds(seed, shards))]
+        # merge in shard order - the result doesn't depend on which
+        # shard finished first
+        for future in futures:
+            result.merge(future.result())
+    result.elapsed = time.perf_counter() - start
+    return result
@@ -3,92 +3,68 @@ import logging
 import random
 
 from blackjack.deck import Deck
-from blackjack.util import delay
+from blackjack.util import delay, log_and_print
+from blackjack.strategy import ConsoleStrategy
 
 log = logging.getLogger("player")
 
 
-def log_and_print(msg, log_f=logging.info, end='\n'):
-    log_f(msg)
-    print(msg, end=end)
-
-
 class IPlayer:
     """
     Common properties for all players and the dealer
     """
+    # no `__dict__` - thousands of tables keep a lot of players around
+    __slots__ = ('nume', 'jetoane', 'balance', 'current_hand', 'lost',
+                 'hard_total', 'aces', 'cards_sum', 'soft', 'busted',
+                 'blackjack')
+
     def __init__(self, nume, jetoane):
         self.nume = nume
         self.jetoane = jetoane
-        self.current_hand = []
-        self.lost = False
+        self.balance = 0
+        self.reset()
 
     def __str__(self):
         return "nume=%s; jetoane=%s;" % (self.nume, self.jetoane)
 
     def draw_card(self, card):
         """
-        Get a card from the deck and add it to the current_hand
+        Get a card (code) from the deck and add it to the current_hand
+        The sum of the cards is updated as the cards come
         """
         self.current_hand.append(card)
+        # aces are counted as `1` in the hard total
+        self.hard_total += Deck.card_values[card]
+        if Deck.is_ace(card):
+            self.aces += 1
+        self.__update_sum()
 
-    def __add_aces(self, s, aces_in_deck):
+    def __update_sum(self):
         """
         Handle the aces in our hand
-            - 1 at most can be added with the value of `11`
-            - the rest, if any, will be added as `1`
-            - if needed the `11` will be turned into a `1`
-
-        Return: integer - the new sum including the aces
+            - 1 at most can be counted with the value of `11`, only if the
+              cards that aren't aces leave room for it (the other aces
+              aren't counted there: 9 A A A is 22, busted)
+            - the rest, if any, are counted as `1`
         """
-
-        def can_we_change_ace():
-            """
-            Helper internal method
-            Returns true if we can change an ace from 11 to 1
-            """
-            return s + Deck.ace.value[0] > 21 and added_ace_11 is True
-
-        added_ace_11 = False
-        for i in range(0, aces_in_deck):
-            if s + Deck.ace.value[1] <= 21:
-                # we can safely add the ace as an 11
-                s += Deck.ace.value[1]
-            else:
-                # if we have only one ace add it as a 1
-                if aces_in_deck == 1:
-                    s += Deck.ace.value[0]
-                    added_ace_11 = True
-                else:
-                    # we have more than 1 ace in the deck
-                    # and adding the final as `1` we will go over 21
-                    # one of the previous ones must have been added
-                    # as an `11` so we subtract 10 to turn it into a `1`
-                    if can_we_change_ace() and i > 0:
-                        s -= 10
-                    # add the ace as a `1`
-                    s += Deck.ace.value[0]
-        return s
+        non_aces = self.hard_total - self.aces * Deck.ace.value[0]
+        self.soft = (self.aces > 0 and
+                     non_aces + Deck.ace.value[1] <= 21)
+        self.cards_sum = self.hard_total
+        if self.soft:
+            self.cards_sum += Deck.ace.value[1] - Deck.ace.value[0]
+        self.busted = self.cards_sum > 21
+        self.blackjack = self.cards_sum == 21
 
     def get_cards_sum(self):
         """
         Get the sum of all the cards in the player's hand
         Return: integer - sum of cards
         """
-        # sum the non-aces first
-        s = sum([card.value for card in self.current_hand
-                 if card.type != Deck.ace_card])
-        # find the number of aces in the deck
-        aces_in_deck = sum([1 for card in self.current_hand
-                           if card.type == Deck.ace_card])
-        # we now have to add `aces_in_deck` aces to
-        # the total sum of the cards
-        s = self.__add_aces(s, aces_in_deck)
-
-        return s
+        return self.cards_sum
 
     def get_cards_str(self):
-        return ' '.join(map(str, self.current_hand))
+        return ' '.join([str(Deck.card(code)) for code in self.current_hand])
 
     def display_name(self):
         """
@@ -110,6 +86,13 @@ class IPlayer:
     def reset(self):
         self.current_hand = []
         self.lost = False
+        # hand state - kept up to date by `draw_card`
+        self.hard_total = 0
+        self.aces = 0
+        self.cards_sum = 0
+        self.soft = False
+        self.busted = False
+        self.blackjack = False
 
     def bet_won(self):
         pass
@@ -122,17 +105,20 @@ class IPlayer:
 
 
 class Dealer(IPlayer):
+    __slots__ = ('borrows',)
+
     def __init__(self, jetoane=2000):
         super().__init__("dealer", jetoane)
-        self.balance = 0
+        # times it borrowed money from the casino
+        self.borrows = 0
 
     def bet_won(self, amount):
-        log.debug('Dealer won %d' % amount)
+        log.debug('Dealer won %d', amount)
         self.jetoane += amount
         self.balance += amount
 
     def bet_lost(self, amount):
-        log.debug('Dealer lost %d' % amount)
+        log.debug('Dealer lost %d', amount)
         self.lost = True
         self.jetoane -= amount
         self.balance -= amount
@@ -143,6 +129,7 @@ class Dealer(IPlayer):
             for i in range(1, 20):
                 delay()
             self.jetoane = 2000
+            self.borrows += 1
             log.info(' >> dealer borrowed money from the casino'
                      '. now has = %d' % self.jetoane)
 
@@ -155,12 +142,20 @@ class Player(IPlayer):
     """
     One player
     """
-    def __init__(self, nume, prenume, varsta, nationalitate, jetoane):
+    __slots__ = ('prenume', 'nationalitate', 'varsta', 'bet_value',
+                 'strategy')
+
+    def __init__(self, nume, prenume, varsta, nationalitate, jetoane,
+                 strategy=None):
         super().__init__(nume, jetoane)
         self.prenume = prenume
         self.nationalitate = nationalitate
         self.varsta = varsta
         self.bet_value = 0
+        # who takes the decisions - a human at the console by default
+        if strategy is None:
+            strategy = ConsoleStrategy()
+        self.strategy = strategy
 
     def __str__(self):
         s = ('nume=%s; prenume=%s; nationalitate=%s;'
@@ -170,25 +165,7 @@ class Player(IPlayer):
         return s
 
     def bet(self):
-        while True:
-            try:
-                bet_value = int(input(' > %s place your bet: '
-                                      % self.nume))
-            except ValueError:
-                print(' > Please enter only digits for the bet amount')
-                continue
-
-            if bet_value > self.jetoane:
-                print(' > You\'re not that rich!!!'
-                      ' Please enter a bet lower'
-                      ' than your total amount [%d] !!!'
-                      % self.jetoane)
-                continue
-
-            if bet_value <= 0:
-                print(' > Really?! Try again!')
-                continue
-            break
+        bet_value = self.strategy.bet(self)
         # set the player's bet
         self.bet_value = bet_value
         self.jetoane -= bet_value
@@ -199,10 +176,9 @@ class Player(IPlayer):
         self.balance = 0
 
     def bet_won(self):
-        log.debug('Player %s won %d' %
-                  (self.nume, (2 * self.bet_value)))
+        log.debug('Player %s won %d', self.nume, 2 * self.bet_value)
         self.jetoane += (2 * self.bet_value)
 
     def draw(self):
-        log.debug('Player %s draw' % self.nume)
+        log.debug('Player %s draw', self.nume)
         self.jetoane += self.bet_value
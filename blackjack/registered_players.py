@@ -2,40 +2,54 @@ import os
 import random
 import logging
 
-from blackjack.player import Player
+from blackjack.roster import Roster
+from blackjack.util import log_and_print
 
 log = logging.getLogger("players")
 
 
-def log_and_print(msg, log_f=logging.info, end='\n'):
-    log_f(msg)
-    print(msg, end=end)
-
-
 class Players:
     """
     Registered players to play the game
     Wrapper around player list
     """
-    def __init__(self, players_file):
+    def __init__(self, players_file=None, players=None, seats=4):
         """
         Load the players file
+
+        players_file - file with the registered players
+        players      - already created `Player` objects (headless games)
+        seats        - max number of players at the table
         """
-        PLAYERS_FILE = 'ListaParticipanti.txt'
         self.players = []
         self.broke_players = []
-        self.__load_players_from_file(players_file)
+        # players who went broke, since the start
+        self.went_broke = 0
+        self.seats = seats
+        self.roster = None
+        if players_file is not None:
+            self.__load_players_from_file(players_file)
+        if players is not None:
+            self.players.extend(players)
         self.__check_number_of_players()
 
     def broke(self, player):
         log_and_print(' >> %s is broke! :(' % player.display_name())
         self.broke_players.append(player)
+        self.went_broke += 1
 
     def remove_broke_players_from_game(self):
         for player in self.broke_players:
             if player in self.players:
                 self.players.remove(player)
 
+    def seat(self, players):
+        """
+        Replace the players at the table with `players`
+        """
+        self.players = list(players)
+        self.broke_players = []
+
     def reset_for_new_game(self):
         for player in self.players:
             player.reset_for_new_game()
@@ -65,21 +79,23 @@ class Players:
         """
         return self.get(all=False, losers=True)
 
+    def all_lost(self):
+        """
+        Return True if all the players lost (or there are none)
+        """
+        return all(p.lost for p in self.players)
+
     def __check_number_of_players(self):
         """
-        Check if we have max 4 players
-        If there are more, 4 players are randomly selected
+        Check if we have max `seats` players (4 by default)
+        If there are more, `seats` players are randomly selected
         """
         # number of registered players
         registered_players = len(self.players)
-        if registered_players > 4:
-            log_and_print(' >> We have %d registered players' %
-                          registered_players)
-            log_and_print(' >> Max is 4')
-            log_and_print(' >> %d random players will leave' %
-                          (registered_players - 4))
-            # choosing 4 random players
-            self.players = random.sample(self.players, 4)
+        if registered_players > self.seats:
+            self.__too_many_players(registered_players)
+            # choosing `seats` random players
+            self.players = random.sample(self.players, self.seats)
 
         # log the list
         log.debug('')
@@ -87,30 +103,34 @@ class Players:
         for player in self.players:
             log.debug(player)
 
+    def __too_many_players(self, registered_players):
+        log_and_print(' >> We have %d registered players' %
+                      registered_players)
+        log_and_print(' >> Max is %d' % self.seats)
+        log_and_print(' >> %d random players will leave' %
+                      (registered_players - self.seats))
+
     def __load_players_from_file(self, player_file):
         """
         Load the players from file `player_file`
+        The file is only indexed - just the players taking a seat are read
+        Malformed rows are skipped (and logged)
         """
         try:
-            with open(player_file) as f:
-                for line in f:
-                    [nume, prenume,
-                     varsta, tara,
-                     jetoane] = line.replace('\n', '').split('\t')
-                    tmp = Player(nume, prenume,
-                                 int(varsta), tara,
-                                 int(jetoane))
-                    self.players.append(tmp)
+            self.roster = Roster(player_file)
         except FileNotFoundError as err:
             log_and_print("FATAL ERROR - File %s not found" % player_file,
                           log_f=logging.error)
             log_and_print(err, log_f=logging.error)
             exit(1)
-        except TypeError as err:
-            log.error("FATAL ERROR - File %s is not properly formatted" %
-                      player_file)
-            log.error(err)
-            exit(1)
+
+        registered_players = len(self.roster)
+        if registered_players > self.seats:
+            self.__too_many_players(registered_players)
+            # choosing `seats` random players
+            self.players.extend(self.roster.sample(self.seats))
+        else:
+            self.players.extend(self.roster)
 
     def log(self):
         """
@@ -0,0 +1,233 @@
+"""
+Replay and payout audit
+
+Every round of a journal is played again, headless, through `Game` /
+`game_outcome`:
+    - the shoe is stacked with the recorded cards, in dealing order
+    - the bankrolls are set to the recorded ones at the start of the round
+    - the players bet and hit exactly as recorded
+
+The replayed hands and bankrolls are compared with the recorded ones and
+every difference is reported. The journal is also checked on its own:
+    - the money is conserved in each round (unless the dealer borrowed)
+    - a bankroll at the start of a round is the one at the end of the
+      player's previous round (in the same session - each run appending
+      to the journal numbers its players again)
+"""
+import os
+import time
+import array
+import random
+import logging
+import tempfile
+
+from blackjack.util import headless
+from blackjack.game import Game
+from blackjack.player import Player
+from blackjack.journal import JournalReader, DEALER, SESSION, BORROWED
+from blackjack.simulation import simulate
+
+log = logging.getLogger("replay")
+
+
+class ReplayStrategy:
+    """
+    Bets and hits as recorded in the journal
+    """
+    def __init__(self):
+        self.bet_value = 0
+        self.hits = 0
+
+    def bet(self, player):
+        return self.bet_value
+
+    def decide(self, player, dealer):
+        if self.hits > 0:
+            self.hits -= 1
+            return 'h'
+        return 's'
+
+
+class AuditReport:
+    def __init__(self):
+        self.rounds = 0
+        self.hands = 0
+        self.elapsed = 0.0
+        # (round, player id, what, expected, replayed)
+        self.divergences = []
+
+    def diverged(self, round, player, what, expected, replayed):
+        self.divergences.append((round, player, what, expected, replayed))
+
+    def ok(self):
+        return len(self.divergences) == 0
+
+    def __str__(self):
+        lines = [' Rounds audited: %d  [%d hands] in %.3fs' %
+                 (self.rounds, self.hands, self.elapsed)]
+        if self.ok():
+            lines.append(' No divergence found')
+            return '\n'.join(lines)
+        lines.append(' %d divergences:' % len(self.divergences))
+        fmt = ' %8s | %6s | %10s | %24s | %24s'
+        lines.append(fmt % ('Round', 'Player', 'What', 'Recorded',
+                            'Replayed'))
+        lines.append('-' * 84)
+        for round, player, what, expected, replayed in self.divergences:
+            lines.append(fmt % (round,
+                                'dealer' if player == DEALER else player,
+                                what, expected, replayed))
+        return '\n'.join(lines)
+
+
+def dealing_order(dealer, seats):
+    """
+    Return: the cards of a round in the order they were drawn from the shoe
+        - first card of each player, the dealer's card, second card of
+          each player
+        - the players' hits, seat by seat
+        - the dealer's hits
+    """
+    cards = array.array('B')
+    cards.extend(record.cards[0] for record in seats)
+    cards.append(dealer.cards[0])
+    cards.extend(record.cards[1] for record in seats)
+    for record in seats:
+        cards.extend(record.cards[2:])
+    cards.extend(dealer.cards[1:])
+    return cards
+
+
+def replay(journal_file):
+    """
+    Replay all the rounds of `journal_file`
+    Return: AuditReport
+    """
+    report = AuditReport()
+    players = {}
+    last_jetoane = {}
+    current_session = None
+
+    with headless():
+        start = time.perf_counter()
+        game = Game(players=[], rng=random.Random(0))
+        with JournalReader(journal_file) as reader:
+            for session, round, records in reader.rounds():
+                if session != current_session:
+                    # the player ids (and the bankrolls) start again
+                    players.clear()
+                    last_jetoane.clear()
+                    current_session = session
+                dealer_record, seats = records[0], records[1:]
+                _check_journal(report, round, records, last_jetoane)
+                _replay_round(report, game, players, round,
+                              dealer_record, seats)
+                report.rounds += 1
+                report.hands += len(seats)
+        report.elapsed = time.perf_counter() - start
+
+    return report
+
+
+def _check_journal(report, round, records, last_jetoane):
+    """
+    Check the records of one round against each other and the previous
+    rounds
+    """
+    if not records[0].flags & BORROWED:
+        total = sum(record.delta for record in records)
+        if total != 0:
+            report.diverged(round, DEALER, 'money', 0, total)
+    for record in records:
+        start = record.jetoane - record.delta
+        previous = last_jetoane.get(record.player)
+        if previous is not None and previous != start:
+            report.diverged(round, record.player, 'carried', previous,
+                            start)
+        last_jetoane[record.player] = record.jetoane
+
+
+def _replay_round(report, game, players, round, dealer_record, seats):
+    """
+    Play one recorded round again and compare it with the record
+    """
+    seated = []
+    for record in seats:
+        player = players.get(record.player)
+        if player is None:
+            player = Player('p%d' % record.player, '', 0, '',
+                            0, ReplayStrategy())
+            players[record.player] = player
+        player.jetoane = record.jetoane - record.delta
+        player.strategy.bet_value = record.bet
+        player.strategy.hits = record.hits
+        seated.append(player)
+    game.players.seat(seated)
+    game.dealer.jetoane = dealer_record.jetoane - dealer_record.delta
+    game.deck.load(dealing_order(dealer_record, seats))
+    game.rounds_played = round
+    game.total_bets = 0
+
+    try:
+        game.run()
+    except IndexError:
+        # the dealer wanted more cards than were recorded
+        report.diverged(round, DEALER, 'cards', dealer_record.cards.hex(),
+                        'more cards')
+        game.players.reset_for_new_game()
+        game.dealer.reset_for_new_game()
+        return
+
+    # `run` resets the hands - compare the cards drawn from the shoe
+    if game.deck.position != len(game.deck.shoe):
+        report.diverged(round, DEALER, 'cards', dealer_record.cards.hex(),
+                        'less cards')
+    if game.dealer.jetoane != dealer_record.jetoane:
+        report.diverged(round, DEALER, 'jetoane', dealer_record.jetoane,
+                        game.dealer.jetoane)
+    for player, record in zip(seated, seats):
+        if player.jetoane != record.jetoane:
+            report.diverged(round, record.player, 'jetoane', record.jetoane,
+                            player.jetoane)
+
+
+def replay_seed(journal_file, strategies, seed, **options):
+    """
+    Run the simulation of `seed` again and compare its journal, record by
+    record, with `journal_file`
+    options - passed on to `simulate` (bankroll, decks, ...)
+    Return: AuditReport
+    Raise: ValueError if more than one run wrote `journal_file`
+    """
+    report = AuditReport()
+    start = time.perf_counter()
+    with JournalReader(journal_file) as recorded:
+        sessions = recorded.sessions()
+        if sessions > 1:
+            raise ValueError('%s was written by %d runs, only one can be'
+                             ' compared with its seed' %
+                             (journal_file, sessions))
+        rounds = max((record[0] for record in recorded.raw_records()),
+                     default=0)
+        fd, replayed_file = tempfile.mkstemp(suffix='.journal')
+        os.close(fd)
+        os.remove(replayed_file)
+        try:
+            simulate(rounds, strategies, seed, journal_file=replayed_file,
+                     **options)
+            with JournalReader(replayed_file) as replayed:
+                for expected, got in zip(recorded.records(),
+                                         replayed.records()):
+                    if expected != got:
+                        report.diverged(expected.round, expected.player,
+                                        'record', expected.jetoane,
+                                        got.jetoane)
+                    report.hands += expected.player not in (DEALER, SESSION)
+                if len(recorded) != len(replayed):
+                    report.diverged(rounds, DEALER, 'records',
+                                    len(recorded), len(replayed))
+        finally:
+            os.remove(replayed_file)
+    report.rounds = rounds
+    report.elapsed = time.perf_counter() - start
+    return report
@@ -0,0 +1,140 @@
+"""
+Random number generators for the shuffles
+
+`Deck` shuffles its shoe once (`rng.shuffle`) - one uniform shuffle is
+enough, any `random.Random` works. The two generators here take all the
+random bytes of a shoe at once, in one bulk buffer, and shuffle it without
+a Python loop over the cards:
+    SeededRandom  - the Mersenne Twister of `random.Random`, seeded: the
+                    same seed always deals the same shoes - simulations
+    SecureRandom  - the OS CSPRNG (`os.urandom`): can't be seeded or
+                    predicted - the real game, the server
+`BACKENDS` has them by name, with `mt` - the plain `random.Random`
+
+The shuffle of a shoe (an `array` of bytes, the card codes) is a sort: each
+card gets a random 22 bit label, packed with its code in a 30 bit key
+    key = label << 8 | code
+and the keys are sorted - by label, so in a uniformly random order. The
+cards whose labels are equal (rare) are shuffled among themselves, so the
+order stays exactly uniform. Anything else is shuffled by `random.Random`
+"""
+import os
+import sys
+import array
+import random
+import logging
+
+log = logging.getLogger("rng")
+
+KEY_BYTES = 4
+# the top byte of a key keeps only 6 random bits: 30 bit keys are the
+# small ints CPython compares fastest
+_TOP_BITS = bytes(range(64)) * 4
+
+
+class _BulkShuffle:
+    """
+    `shuffle` from a buffer of random bytes - the subclasses fill it
+    """
+    def _random_bytes(self, count):
+        """
+        Return: `count` random bytes
+        """
+        raise NotImplementedError
+
+    def shuffle(self, x):
+        """
+        Shuffle the list / array `x` in place
+        """
+        if not isinstance(x, array.array) or x.typecode != 'B':
+            super().shuffle(x)
+            return
+        n = len(x)
+        if n < 2:
+            return
+        # little endian keys: the code in the low byte, the label above
+        buf = bytearray(self._random_bytes(KEY_BYTES * n))
+        buf[KEY_BYTES - 1::KEY_BYTES] = \
+            buf[KEY_BYTES - 1::KEY_BYTES].translate(_TOP_BITS)
+        buf[::KEY_BYTES] = bytes(n)
+        labels = self.__keys(buf)
+        buf[::KEY_BYTES] = x
+        keys = sorted(self.__keys(buf))
+        if len(set(labels)) < n:
+            self.__untie(keys)
+        keys = array.array('I', keys)
+        if sys.byteorder != 'little':
+            keys.byteswap()
+        x[:] = array.array('B', keys.tobytes()[::KEY_BYTES])
+
+    @staticmethod
+    def __keys(buf):
+        keys = array.array('I')
+        keys.frombytes(buf)
+        if sys.byteorder != 'little':
+            keys.byteswap()
+        return keys
+
+    def __untie(self, keys):
+        """
+        Shuffle the runs of (sorted) `keys` with the same label - they
+        were sorted by card code
+        """
+        start = 0
+        while start < len(keys):
+            label = keys[start] >> 8
+            end = start + 1
+            while end < len(keys) and keys[end] >> 8 == label:
+                end += 1
+            if end - start > 1:
+                run = keys[start:end]
+                super().shuffle(run)
+                keys[start:end] = run
+            start = end
+
+
+class SeededRandom(_BulkShuffle, random.Random):
+    """
+    Fast and reproducible; nothing is left in the buffer between two
+    shuffles, so `getstate` / `setstate` (checkpoints) still work
+    """
+    def _random_bytes(self, count):
+        return self.getrandbits(8 * count).to_bytes(count, 'little')
+
+
+class SecureRandom(_BulkShuffle, random.SystemRandom):
+    """
+    The OS CSPRNG - nobody can guess the next shoe, not even with the seed
+    """
+    def __init__(self, seed=None):
+        # there's nothing to seed - `seed` is only taken for `make`
+        super().__init__()
+
+    def _random_bytes(self, count):
+        return os.urandom(count)
+
+
+BACKENDS = {
+    'seeded': SeededRandom,
+    'secure': SecureRandom,
+    'mt': random.Random,
+}
+
+
+def make(backend=None, seed=None):
+    """
+    Return: a new generator of the `backend` in `BACKENDS`
+    None - `secure` if there's no `seed`, `seeded` otherwise
+    """
+    if backend is None:
+        backend = 'secure' if seed is None else 'seeded'
+    if backend not in BACKENDS:
+        raise ValueError('unknown random number generator %r' % backend)
+    return BACKENDS[backend](seed)
+
+
+def has_state(rng):
+    """
+    Return: True if the state of `rng` can be saved and restored
+    """
+    return not isinstance(rng, random.SystemRandom)
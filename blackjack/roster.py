@@ -0,0 +1,192 @@
+"""
+Players roster
+
+Index of a tab separated players file:
+    nume    prenume    varsta    nationalitate    jetoane
+
+The file is scanned once, in chunks, and only the position of each valid
+row is kept (plus the rows of each name and nationality). `Player` objects
+are created only for the rows that are actually needed, so samples can be
+taken out of files with millions of rows without loading them
+"""
+import os
+import array
+import pickle
+import random
+import logging
+
+from blackjack.player import Player
+
+log = logging.getLogger("roster")
+
+FIELDS = 5
+INDEX_VERSION = 1
+
+
+def parse_row(line):
+    """
+    Return: the fields of a row - (nume, prenume, varsta, tara, jetoane)
+    Raise: ValueError if the row is malformed
+    """
+    fields = line.rstrip('\r\n').split('\t')
+    if len(fields) != FIELDS:
+        raise ValueError('expected %d fields, got %d' %
+                         (FIELDS, len(fields)))
+    nume, prenume, varsta, tara, jetoane = fields
+    return nume, prenume, int(varsta), tara, int(jetoane)
+
+
+class Roster:
+    def __init__(self, players_file, index_file=None, chunk_size=1 << 20):
+        """
+        Index `players_file`
+
+        index_file - keep the index in this file; it's reused as long as
+                     the players file doesn't change
+        chunk_size - bytes read at once while scanning
+        """
+        self.players_file = players_file
+        self.chunk_size = chunk_size
+        stat = os.stat(players_file)
+        self.__signature = (INDEX_VERSION, stat.st_size, stat.st_mtime_ns)
+
+        if index_file is None or not self.__load_index(index_file):
+            self.__build_index()
+            if index_file is not None:
+                self.__save_index(index_file)
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def __iter__(self):
+        """
+        Stream all the valid rows as `Player` objects
+        """
+        with open(self.players_file, encoding='utf-8') as f:
+            for line in f:
+                try:
+                    yield Player(*parse_row(line))
+                except ValueError:
+                    continue
+
+    def __build_index(self):
+        """
+        Scan the players file, chunk by chunk
+        """
+        # byte offset of each valid row
+        self.offsets = array.array('Q')
+        # row numbers for each name / nationality
+        self.by_name = {}
+        self.by_nationality = {}
+        self.malformed = 0
+
+        offset = 0
+        line_number = 0
+        rest = b''
+        with open(self.players_file, 'rb') as f:
+            while True:
+                chunk = f.read(self.chunk_size)
+                if not chunk:
+                    break
+                lines = (rest + chunk).split(b'\n')
+                # the last line may continue in the next chunk
+                rest = lines.pop()
+                for line in lines:
+                    line_number += 1
+                    self.__index_row(line, offset, line_number)
+                    offset += len(line) + 1
+        # the last row has no new line after it
+        if rest:
+            line_number += 1
+            self.__index_row(rest, offset, line_number)
+
+        log.info('%s: %d players, %d malformed rows' %
+                 (self.players_file, len(self.offsets), self.malformed))
+
+    def __index_row(self, line, offset, line_number):
+        if not line.strip():
+            return
+        try:
+            nume, prenume, varsta, tara, jetoane = \
+                parse_row(line.decode('utf-8'))
+        except (ValueError, UnicodeDecodeError) as err:
+            self.malformed += 1
+            log.warning('%s:%d - malformed row skipped: %s' %
+                        (self.players_file, line_number, err))
+            return
+        row = len(self.offsets)
+        self.offsets.append(offset)
+        self.by_name.setdefault(nume, array.array('L')).append(row)
+        self.by_nationality.setdefault(tara, array.array('L')).append(row)
+
+    def __load_index(self, index_file):
+        try:
+            with open(index_file, 'rb') as f:
+                index = pickle.load(f)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            return False
+        if index.get('signature') != self.__signature:
+            return False
+        self.offsets = index['offsets']
+        self.by_name = index['by_name']
+        self.by_nationality = index['by_nationality']
+        self.malformed = index['malformed']
+        return True
+
+    def __save_index(self, index_file):
+        index = {
+            'signature': self.__signature,
+            'offsets': self.offsets,
+            'by_name': self.by_name,
+            'by_nationality': self.by_nationality,
+            'malformed': self.malformed,
+        }
+        tmp_file = index_file + '.tmp'
+        with open(tmp_file, 'wb') as f:
+            pickle.dump(index, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_file, index_file)
+
+    def find(self, nume=None, nationalitate=None):
+        """
+        Return: the row numbers of the players with the given name and / or
+        nationality (all the rows if none is given)
+        """
+        if nume is None and nationalitate is None:
+            return range(len(self.offsets))
+        rows = None
+        if nume is not None:
+            rows = self.by_name.get(nume, ())
+        if nationalitate is not None:
+            same_nationality = self.by_nationality.get(nationalitate, ())
+            if rows is None:
+                rows = same_nationality
+            else:
+                same_nationality = set(same_nationality)
+                rows = [row for row in rows if row in same_nationality]
+        return rows
+
+    def fields(self, rows):
+        """
+        Return: the fields of `rows` (see `parse_row`) - only these rows
+        are read
+        """
+        fields = []
+        with open(self.players_file, 'rb') as f:
+            for row in rows:
+                f.seek(self.offsets[row])
+                fields.append(parse_row(f.readline().decode('utf-8')))
+        return fields
+
+    def players(self, rows):
+        """
+        Return: the `Player` objects of `rows` - only these rows are read
+        """
+        return [Player(*fields) for fields in self.fields(rows)]
+
+    def sample(self, k, nume=None, nationalitate=None, rng=random):
+        """
+        Return: `k` random players (fewer if there aren't enough), filtered
+        by name and / or nationality
+        """
+        rows = self.find(nume, nationalitate)
+        return self.players(rng.sample(rows, min(k, len(rows))))
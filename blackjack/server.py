@@ -0,0 +1,372 @@
+"""
+Asyncio game server
+
+Many tables in one process. The clients connect over TCP or a Unix socket
+and talk in newline-delimited JSON messages:
+
+    client -> server
+        {"join": "name", "jetoane": 100}    take a seat
+        {"bet": 10, "id": 1}                answer to a "bet" message
+        {"action": "h", "id": 2}            answer to a "decide" message
+                                            ("h" or "s")
+
+    server -> client
+        {"type": "seated", "table": 1}
+        {"type": "bet", "jetoane": 100, "id": 1}
+        {"type": "decide", "hand": "...", "sum": 15, "dealer": "...",
+         "id": 2}
+        {"type": "timeout", "id": 2, "default": "s"}
+        {"type": "result", "hand": "...", "sum": 19, "dealer": "...",
+         "dealer_sum": 18, "delta": 10, "jetoane": 110}
+        {"type": "broke"}                   the connection is then closed
+        {"type": "error", "message": "..."}
+
+The answers carry the `id` of the question; late answers, to questions
+that already timed out, are ignored. The bets of all the seats are asked
+for at the same time and every answer has a deadline (`Deadlines`), so a
+slow player can't stall a table for more than that
+
+A table plays its rounds as long as it has players; an idle connection or
+an empty table costs nothing but its memory
+"""
+import json
+import random
+import asyncio
+import logging
+
+from blackjack.game import Game
+from blackjack.player import Player
+from blackjack.util import headless
+from blackjack import rng as rngs
+
+log = logging.getLogger("server")
+
+
+class RemoteStrategy:
+    """
+    The decisions come from the network - the bet is received before the
+    round starts, the (h)it or (s)tand answers are played by the table
+    """
+    def __init__(self):
+        self.bet_value = 0
+
+    def bet(self, player):
+        return self.bet_value
+
+
+class Deadlines:
+    def __init__(self, bet=30.0, decision=30.0, min_bet=1):
+        """
+        How long a table waits for its players (seconds, None - forever)
+            bet      - to place a bet; then `min_bet` is bet for them
+            decision - for each (h)it or (s)tand; then the player stands
+        """
+        self.bet = bet
+        self.decision = decision
+        self.min_bet = min_bet
+
+
+async def with_deadline(answer, timeout, default):
+    """
+    Wait at most `timeout` seconds for the `answer` coroutine
+    Return: (the answer or `default`, True if the time ran out)
+    """
+    try:
+        return await asyncio.wait_for(answer, timeout), False
+    except asyncio.TimeoutError:
+        return default, True
+
+
+class Seat:
+    """
+    One client connection
+    """
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+        self.player = None
+        self.connected = True
+        # id of the last question asked
+        self.question = 0
+        # set when the client leaves the table
+        self.closed = asyncio.get_running_loop().create_future()
+
+    async def send(self, **message):
+        if not self.connected:
+            return
+        try:
+            self.writer.write(json.dumps(message).encode() + b'\n')
+            await self.writer.drain()
+        except ConnectionError:
+            self.connected = False
+
+    async def ask(self, **message):
+        """
+        Send a question - the answer must have the same `id`
+        """
+        self.question += 1
+        await self.send(id=self.question, **message)
+
+    async def answer(self):
+        """
+        Return: the answer to the last question, None if the client
+        disconnected
+        """
+        while True:
+            message = await self.receive()
+            if message is None or \
+                    message.get('id', self.question) == self.question:
+                return message
+
+    async def receive(self):
+        """
+        Return: the next message, None if the client disconnected
+        """
+        while self.connected:
+            try:
+                line = await self.reader.readline()
+            except ConnectionError:
+                line = b''
+            if not line:
+                self.connected = False
+                break
+            try:
+                message = json.loads(line)
+            except ValueError:
+                await self.send(type='error', message='not a JSON message')
+                continue
+            if isinstance(message, dict):
+                return message
+            await self.send(type='error', message='not a JSON object')
+        return None
+
+    def leave(self):
+        if not self.closed.done():
+            self.closed.set_result(None)
+
+
+class Table:
+    def __init__(self, number, seats, rng, deadlines, latency=None):
+        self.number = number
+        self.deadlines = deadlines
+        self.seats = []
+        self.joining = []
+        self.game = Game(players=[], rng=rng, seats=seats, latency=latency)
+        self.has_players = asyncio.Event()
+
+    def free_seats(self):
+        return self.game.players.seats - len(self.seats) - len(self.joining)
+
+    def join(self, seat):
+        self.joining.append(seat)
+        self.has_players.set()
+
+    async def run(self):
+        """
+        Play rounds as long as there are players, wait for them otherwise
+        """
+        while True:
+            await self.has_players.wait()
+            self.seats.extend(self.joining)
+            self.joining = []
+            self.__leave([seat for seat in self.seats if not seat.connected])
+            if not self.seats:
+                self.has_players.clear()
+                continue
+            try:
+                await self.play_round()
+            except Exception:
+                log.exception('Table %d - round failed' % self.number)
+                self.game.reset()
+
+    def __leave(self, seats):
+        for seat in seats:
+            self.seats.remove(seat)
+            seat.leave()
+        self.game.players.seat([seat.player for seat in self.seats])
+
+    async def ask_bet(self, seat):
+        """
+        Return: the bet of `seat`, None if the client left
+        """
+        player = seat.player
+        await seat.ask(type='bet', jetoane=player.jetoane)
+        while True:
+            message = await seat.answer()
+            if message is None:
+                return None
+            bet_value = message.get('bet')
+            if (not isinstance(bet_value, int) or
+                    not 0 < bet_value <= player.jetoane):
+                await seat.send(type='error', message='bet between 1 and %d'
+                                % player.jetoane)
+                continue
+            return bet_value
+
+    async def ask_decision(self, seat):
+        """
+        Return: 'h' or 's' - 's' if the client left
+        """
+        player = seat.player
+        await seat.ask(type='decide', hand=player.get_cards_str(),
+                       sum=player.get_cards_sum(),
+                       dealer=self.game.dealer.get_cards_str())
+        while True:
+            message = await seat.answer()
+            if message is None:
+                return 's'
+            answer = message.get('action')
+            if answer in ('h', 's'):
+                return answer
+            await seat.send(type='error', message='action is "h" or "s"')
+
+    async def collect_bet(self, seat):
+        """
+        Return: the bet of `seat` - the minimum bet if it took too long,
+        None if the client left
+        """
+        default = min(self.deadlines.min_bet, seat.player.jetoane)
+        bet_value, late = await with_deadline(self.ask_bet(seat),
+                                              self.deadlines.bet, default)
+        if late:
+            await seat.send(type='timeout', id=seat.question,
+                            default=bet_value)
+        return bet_value
+
+    async def collect_decision(self, seat):
+        """
+        Return: 'h' or 's' - 's' if it took too long or the client left
+        """
+        answer, late = await with_deadline(self.ask_decision(seat),
+                                           self.deadlines.decision, 's')
+        if late:
+            await seat.send(type='timeout', id=seat.question, default=answer)
+        return answer
+
+    async def play_round(self):
+        game = self.game
+
+        # bets - all the seats at once
+        seats = list(self.seats)
+        bets = await asyncio.gather(*[self.collect_bet(seat)
+                                      for seat in seats])
+        for seat, bet_value in zip(seats, bets):
+            if bet_value is None:
+                self.__leave([seat])
+            else:
+                seat.player.strategy.bet_value = bet_value
+        # nobody left - the round isn't played (nor counted)
+        if not self.seats:
+            return
+        game.start_round()
+        game.begin_round()
+
+        # players' turn
+        for seat in self.seats:
+            while not game.play(seat.player,
+                                await self.collect_decision(seat)):
+                pass
+
+        # dealer and outcome
+        jetoane = [seat.player.jetoane + seat.player.bet_value
+                   for seat in self.seats]
+        game.end_round()
+        dealer = game.dealer
+        for seat, before in zip(self.seats, jetoane):
+            player = seat.player
+            await seat.send(type='result', hand=player.get_cards_str(),
+                            sum=player.get_cards_sum(),
+                            dealer=dealer.get_cards_str(),
+                            dealer_sum=dealer.get_cards_sum(),
+                            delta=player.jetoane - before,
+                            jetoane=player.jetoane)
+        game.reset()
+
+        # broke players and disconnected clients leave
+        broke = [seat for seat in self.seats if seat.player.jetoane == 0]
+        for seat in broke:
+            await seat.send(type='broke')
+        self.__leave(broke + [seat for seat in self.seats
+                              if not seat.connected and seat not in broke])
+
+
+class Server:
+    def __init__(self, seats=4, seed=None, deadlines=None, latency=None,
+                 metrics=None, backend=None):
+        """
+        seats     - seats at each table
+        seed      - seed for the tables' decks
+        deadlines - how long the tables wait for the players
+        latency   - `Latency` timing the rounds of all the tables
+        metrics   - `MetricsServer` exporting the metrics of all the tables
+        backend   - random number generator of the decks, one of
+                    `rng.BACKENDS`; None - `secure`, `seeded` with a seed
+        """
+        self.seats = seats
+        self.deadlines = deadlines if deadlines is not None else Deadlines()
+        self.latency = latency
+        self.metrics = metrics
+        if backend is None:
+            backend = 'secure' if seed is None else 'seeded'
+        self.backend = backend
+        self.rng = random.Random(seed)
+        self.tables = []
+        self.__tasks = set()
+        self.connections = 0
+
+    def __table_with_free_seat(self):
+        for table in self.tables:
+            if table.free_seats() > 0:
+                return table
+        table = Table(len(self.tables) + 1, self.seats,
+                      rngs.make(self.backend, self.rng.getrandbits(64)),
+                      self.deadlines, self.latency)
+        self.tables.append(table)
+        if self.metrics is not None:
+            self.metrics.watch(table.game)
+        task = asyncio.get_running_loop().create_task(table.run())
+        self.__tasks.add(task)
+        log.info('Table %d opened' % table.number)
+        return table
+
+    async def handle(self, reader, writer):
+        """
+        One client: wait for it to join, give it a seat and keep the
+        connection until it leaves the table
+        """
+        self.connections += 1
+        seat = Seat(reader, writer)
+        try:
+            while True:
+                message = await seat.receive()
+                if message is None:
+                    return
+                name = message.get('join')
+                jetoane = message.get('jetoane')
+                if (isinstance(name, str) and isinstance(jetoane, int) and
+                        jetoane > 0):
+                    break
+                await seat.send(type='error',
+                                message='join with a name and jetoane > 0')
+            seat.player = Player(name, '', 0, '', jetoane, RemoteStrategy())
+            table = self.__table_with_free_seat()
+            await seat.send(type='seated', table=table.number)
+            table.join(seat)
+            await seat.closed
+        finally:
+            self.connections -= 1
+            writer.close()
+
+    async def serve(self, host='127.0.0.1', port=8021, path=None):
+        """
+        Serve on TCP `host`:`port`, or on the Unix socket `path`
+        """
+        with headless():
+            if path is not None:
+                server = await asyncio.start_unix_server(self.handle, path)
+            else:
+                server = await asyncio.start_server(self.handle, host, port)
+            log.info('Serving on %s' % ', '.join(
+                str(sock.getsockname()) for sock in server.sockets))
+            async with server:
+                await server.serve_forever()
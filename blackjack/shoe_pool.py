@@ -0,0 +1,71 @@
+"""
+Pool of shuffled shoes
+
+A worker thread shuffles shoes ahead of time, so when the game needs a
+new shoe it just takes one that's ready instead of shuffling on the spot
+"""
+import queue
+import logging
+import threading
+
+from blackjack.deck import Deck
+from blackjack.rng import SeededRandom
+
+log = logging.getLogger("shoe_pool")
+
+
+class ShoePool:
+    def __init__(self, decks=1, size=2, rng=None):
+        """
+        decks - number of packs in each shoe
+        size  - number of shuffled shoes kept ready
+        rng   - random number generator used for shuffling
+                (`random.Random`, see `blackjack.rng`); the shoes come
+                out in the same order for the same seed
+        """
+        self.decks = decks
+        self.rng = rng if rng is not None else SeededRandom()
+        self.__fresh = Deck.new_shoe(decks)
+        self.__ready = queue.Queue(maxsize=size)
+        self.__used = queue.Queue()
+        self.__stop = threading.Event()
+        self.__worker = threading.Thread(target=self.__run,
+                                         name='shoe-pool', daemon=True)
+        self.__worker.start()
+
+    def __run(self):
+        """
+        Worker thread - keep `size` shuffled shoes ready
+        """
+        shoe = None
+        while not self.__stop.is_set():
+            if shoe is None:
+                try:
+                    shoe = self.__used.get_nowait()
+                except queue.Empty:
+                    shoe = Deck.new_shoe(self.decks)
+                # start from the cards in order, so recycled shoes
+                # don't change the outcome of the shuffle
+                shoe[:] = self.__fresh
+                self.rng.shuffle(shoe)
+            try:
+                self.__ready.put(shoe, timeout=0.1)
+                shoe = None
+            except queue.Full:
+                continue
+
+    def get(self):
+        """
+        Return: a shuffled shoe; waits only if none is ready yet
+        """
+        return self.__ready.get()
+
+    def recycle(self, shoe):
+        """
+        Give back a used shoe, it will be shuffled and served again
+        """
+        self.__used.put(shoe)
+
+    def close(self):
+        self.__stop.set()
+        self.__worker.join()
@@ -0,0 +1,212 @@
+"""
+Headless simulations
+
+The same `Game` / `game_outcome` logic as the console game, with the
+decisions taken by strategies and without any console output or delays
+"""
+import time
+import struct
+import logging
+
+from blackjack.util import headless
+from blackjack.game import Game
+from blackjack.player import Player
+from blackjack.journal import JournalWriter
+from blackjack.ledger import Ledger
+from blackjack import checkpoint
+from blackjack import rng as rngs
+from blackjack.shoe_pool import ShoePool
+
+log = logging.getLogger("simulation")
+
+# checkpointed results: rounds, hands, dealer net; per seat: wins, losses,
+# draws, net
+RESULT = struct.Struct('<QQq')
+SEAT_RESULT = struct.Struct('<QQQq')
+
+
+class SimulationResult:
+    """
+    Aggregated results of a simulation
+        - per seat: rounds won / lost / draw and the net amount won
+        - the dealer's net amount (casino borrowings not included)
+    """
+    def __init__(self, seats):
+        self.seats = seats
+        self.rounds = 0
+        self.hands = 0
+        self.wins = [0] * seats
+        self.losses = [0] * seats
+        self.draws = [0] * seats
+        self.net = [0] * seats
+        self.dealer_net = 0
+        self.elapsed = 0.0
+
+    def add_hand(self, seat, delta):
+        """
+        Account one settled hand of `seat`; `delta` is the money won / lost
+        """
+        self.hands += 1
+        self.net[seat] += delta
+        self.dealer_net -= delta
+        if delta > 0:
+            self.wins[seat] += 1
+        elif delta < 0:
+            self.losses[seat] += 1
+        else:
+            self.draws[seat] += 1
+
+    def add_hands(self, seat, wins, losses, draws, net):
+        """
+        Account many settled hands of `seat` at once
+        """
+        self.hands += wins + losses + draws
+        self.wins[seat] += wins
+        self.losses[seat] += losses
+        self.draws[seat] += draws
+        self.net[seat] += net
+        self.dealer_net -= net
+
+    def merge(self, other):
+        """
+        Add the results of `other` (same seats) to this one
+        """
+        self.rounds += other.rounds
+        for seat in range(self.seats):
+            self.add_hands(seat, other.wins[seat], other.losses[seat],
+                           other.draws[seat], other.net[seat])
+        self.elapsed += other.elapsed
+
+    def rounds_per_second(self):
+        if self.elapsed == 0:
+            return 0.0
+        return self.rounds / self.elapsed
+
+    def __str__(self):
+        fmt = ' %6s | %10s | %10s | %10s | %12s'
+        lines = [
+            ' Rounds played: %d  [%d hands]' % (self.rounds, self.hands),
+            ' Elapsed: %.3fs  [%.0f rounds/s]' % (self.elapsed,
+                                                  self.rounds_per_second()),
+            '',
+            fmt % ('Seat', 'Won', 'Lost', 'Draw', 'Net'),
+            '-' * 60,
+        ]
+        for seat in range(self.seats):
+            lines.append(fmt % (seat + 1, self.wins[seat],
+                                self.losses[seat], self.draws[seat],
+                                self.net[seat]))
+        lines.append('-' * 60)
+        lines.append(fmt % ('Dealer', '', '', '', self.dealer_net))
+        return '\n'.join(lines)
+
+
+def simulate(n_rounds, strategies, seed=None, bankroll=1000000,
+             decks=1, penetration=None, use_pool=False, journal_file=None,
+             ledger=False, counters=(), latency=None, metrics=None,
+             checkpoint_file=None, checkpoint_every=10000,
+             backend='seeded'):
+    """
+    Play `n_rounds` rounds with one seat for each strategy in `strategies`
+
+    seed        - seed for the deck shuffling; the same seed and strategies
+                  always give the same results
+    bankroll    - money each seat starts with
+    decks       - number of packs in the shoe
+    penetration - fraction of the shoe dealt before reshuffling
+    use_pool    - shuffle the shoes ahead of time on a worker thread
+    journal_file - record every round in this binary journal
+    ledger      - keep the books in a `Ledger`, checked every round
+                  (raises `LedgerError` if the money doesn't add up)
+    counters    - `CardCounter`s counting the shoe (for the strategies
+                  that bet / play by the count)
+    latency     - `Latency` timing the phases of the rounds
+    metrics     - `MetricsServer` exporting the game's metrics
+    checkpoint_file - save the game and the results in this file every
+                  `checkpoint_every` rounds, and at the end; if the file
+                  exists the simulation resumes from it; not with
+                  `use_pool` - the pool shuffles ahead, its state can't
+                  be saved with the game
+    backend     - random number generator of the shuffles, one of
+                  `rng.BACKENDS` (`secure` can't be seeded)
+
+    The simulation stops early if all the seats went broke
+    Return: SimulationResult
+    Raise: ValueError for `use_pool` with a `checkpoint_file`
+    """
+    if use_pool and checkpoint_file is not None:
+        raise ValueError('a simulation with a shoe pool can\'t be'
+                         ' checkpointed - the resumed one wouldn\'t deal'
+                         ' the same shoes')
+    players = [Player('seat%d' % (seat + 1), '', 0, '', bankroll, strategy)
+               for seat, strategy in enumerate(strategies)]
+    result = SimulationResult(len(players))
+
+    rng = rngs.make(backend, seed)
+    pool = None
+    if use_pool:
+        pool = ShoePool(decks, rng=rngs.make(backend, rng.getrandbits(64)))
+    journal = None
+    if journal_file is not None:
+        journal = JournalWriter(journal_file)
+    try:
+        with headless():
+            start = time.perf_counter()
+            game = Game(players=players, rng=rng, seats=len(players),
+                        decks=decks, penetration=penetration, pool=pool,
+                        journal=journal,
+                        ledger=Ledger(history=False) if ledger else None,
+                        latency=latency)
+            for counter in counters:
+                counter.attach(game.deck)
+            if metrics is not None:
+                metrics.watch(game)
+            if checkpoint_file is not None:
+                saved = checkpoint.restore(game, checkpoint_file)
+                if saved is not None:
+                    _unpack_result(result, saved)
+            for i in range(result.rounds, n_rounds):
+                if game.players_in_game() == 0:
+                    log.info('All the seats went broke after %d rounds' % i)
+                    break
+                game.start_round()
+                seated = [(seat, player, player.jetoane)
+                          for seat, player in enumerate(players)
+                          if player in game.players.players]
+                game.run()
+                for seat, player, jetoane in seated:
+                    result.add_hand(seat, player.jetoane - jetoane)
+                result.rounds += 1
+                if (checkpoint_file is not None and
+                        result.rounds % checkpoint_every == 0):
+                    checkpoint.save(game, checkpoint_file,
+                                    _pack_result(result))
+            if checkpoint_file is not None:
+                checkpoint.save(game, checkpoint_file, _pack_result(result))
+            result.elapsed = time.perf_counter() - start
+    finally:
+        if pool is not None:
+            pool.close()
+        if journal is not None:
+            journal.close()
+
+    return result
+
+
+def _pack_result(result):
+    return RESULT.pack(result.rounds, result.hands, result.dealer_net) + \
+        b''.join(SEAT_RESULT.pack(result.wins[seat], result.losses[seat],
+                                  result.draws[seat], result.net[seat])
+                 for seat in range(result.seats))
+
+
+def _unpack_result(result, data):
+    """
+    Continue `result` from the checkpointed one
+    """
+    result.rounds, result.hands, result.dealer_net = \
+        RESULT.unpack_from(data)
+    for seat in range(result.seats):
+        (result.wins[seat], result.losses[seat], result.draws[seat],
+         result.net[seat]) = SEAT_RESULT.unpack_from(
+            data, RESULT.size + seat * SEAT_RESULT.size)
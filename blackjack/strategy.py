@@ -0,0 +1,63 @@
+"""
+Player strategies
+
+A strategy decides, for one player:
+    - how much to bet at the beginning of a round
+    - (h)it or (s)tand during the player's turn
+"""
+
+
+class ConsoleStrategy:
+    """
+    Interactive strategy - the decisions are typed in by a human
+    """
+    def bet(self, player):
+        while True:
+            try:
+                bet_value = int(input(' > %s place your bet: '
+                                      % player.nume))
+            except ValueError:
+                print(' > Please enter only digits for the bet amount')
+                continue
+
+            if bet_value > player.jetoane:
+                print(' > You\'re not that rich!!!'
+                      ' Please enter a bet lower'
+                      ' than your total amount [%d] !!!'
+                      % player.jetoane)
+                continue
+
+            if bet_value <= 0:
+                print(' > Really?! Try again!')
+                continue
+            return bet_value
+
+    def decide(self, player, dealer):
+        answer = ' '
+        while answer != 'h' and answer != 's':
+            answer = input('%s : (h)it or (s)tand? ' %
+                           player.display_name()).lower()
+        return answer
+
+
+class ThresholdStrategy:
+    """
+    Automated strategy
+        - bets the same amount every round (or all in if it has less)
+        - hits until the sum of the cards reaches `stand_on`
+    """
+    def __init__(self, stand_on=17, bet_value=10):
+        self.stand_on = stand_on
+        self.bet_value = bet_value
+
+    def __repr__(self):
+        return 'ThresholdStrategy(stand_on=%d, bet_value=%d)' % (
+            self.stand_on, self.bet_value)
+
+    def bet(self, player):
+        return min(self.bet_value, player.jetoane)
+
+    def decide(self, player, dealer):
+        if player.get_cards_sum() < self.stand_on:
+            return 'h'
+        return 's'
@@ -2,9 +2,72 @@
 What's the world without an `util` module?
 Everything you need for a game of blackjack
 """
-import time
+import queue
+import atexit
+import logging
+import contextlib
+import logging.handlers
+
+from blackjack import pacing
+
+# console output - turned off for headless runs (simulations)
+console = True
+
+
+def log_and_print(msg, log_f=logging.info, end='\n'):
+    log_f(msg)
+    if console:
+        print(msg, end=end)
+
+
+def output_enabled(level=logging.INFO):
+    """
+    Return True if a message of `level` given to `log_and_print` would end
+    up somewhere (console or log) - expensive messages are built only then
+    """
+    return console or logging.getLogger().isEnabledFor(level)
+
+
+def start_logging(log_file, level=logging.DEBUG,
+                  fmt='%(asctime)s | %(levelname)5.5s | %(name)10s'
+                      ' | %(message)s'):
+    """
+    Log to `log_file` from a background thread
+    The game only puts the records in a queue, so writing the file never
+    blocks it
+    Return: the queue listener - it's stopped (and flushed) at exit
+    """
+    records = queue.SimpleQueue()
+    file_handler = logging.FileHandler(log_file, 'w', 'utf-8')
+    file_handler.setFormatter(logging.Formatter(fmt))
+    listener = logging.handlers.QueueListener(records, file_handler)
+
+    root = logging.getLogger()
+    root.addHandler(logging.handlers.QueueHandler(records))
+    root.setLevel(level)
+
+    listener.start()
+    atexit.register(listener.stop)
+    return listener
+
+
+@contextlib.contextmanager
+def headless():
+    """
+    No console output and no waiting - for simulations, servers, replays
+    """
+    global console
+    previous_console = console
+    console = False
+    previous_clock = pacing.set_clock(pacing.VirtualClock())
+    try:
+        yield
+    finally:
+        console = previous_console
+        pacing.set_clock(previous_clock)
 
 
 def delay(time_ms=100):
-    time.sleep(100 / 1000)
-    print('.', end='')
+    pacing.sleep(time_ms / 1000)
+    if console:
+        print('.', end='', flush=True)
@@ -0,0 +1,202 @@
+"""
+Vectorized Monte Carlo engine
+
+Plays thousands of tables in lockstep: each table's shoe is a row in a 2-D
+array of card codes and every step of a round (deal, player turns, dealer
+turn, settlement) is done for all the tables at once with numpy
+
+The rules are the ones of `Game` / `game_outcome`:
+    - players get one card, the dealer one card, the players a second one
+    - the players play in seat order
+    - the dealer doesn't play if all the players went over 21, otherwise
+      draws until the sum is over 17
+    - the winners are paid 1:1, draws get their bet back
+    - the shoe is changed when the cut card is reached or when less than
+      5 cards per person are left
+
+Only `ThresholdStrategy`-like strategies are supported (a `stand_on` sum
+and a flat `bet_value`) and the bankrolls are unlimited - nobody goes
+broke and the dealer never has to borrow money
+"""
+import time
+import logging
+
+try:
+    import numpy as np
+except ImportError as err:
+    raise ImportError('The vectorized engine needs numpy'
+                      ' (pip install numpy)') from err
+
+from blackjack.deck import Deck
+from blackjack.simulation import SimulationResult
+
+log = logging.getLogger("vectorized")
+
+# per card code: the value (aces counted as `1`) and if it's an ace
+CARD_VALUES = np.array(Deck.card_values, dtype=np.int16)
+CARD_ACES = np.array([Deck.is_ace(code) for code in range(Deck.DECK_SIZE)],
+                     dtype=np.int16)
+ACE_BONUS = Deck.ace.value[1] - Deck.ace.value[0]
+
+
+def hand_sums(hard, aces):
+    """
+    Sum of the cards for arrays of hands - same rules as `IPlayer`
+        hard - sum of the cards with the aces counted as `1`
+        aces - number of aces in the hand
+    """
+    soft = (aces > 0) & (hard - aces + Deck.ace.value[1] <= 21)
+    return hard + ACE_BONUS * soft
+
+
+class Shoes:
+    """
+    One shoe per table, as rows of card codes
+
+    Each row is the shoe itself followed by a spare pack, used only if a
+    round runs out of cards
+    """
+    def __init__(self, tables, decks, penetration, rng):
+        self.rng = rng
+        self.size = Deck.DECK_SIZE * decks
+        if penetration is None:
+            self.cut = self.size
+        else:
+            self.cut = int(self.size * penetration)
+        fresh = np.tile(np.arange(Deck.DECK_SIZE, dtype=np.uint8), decks + 1)
+        self.cards = np.tile(fresh, (tables, 1))
+        self.position = np.zeros(tables, dtype=np.int64)
+        self.shuffles = 0
+        self.shuffle(np.ones(tables, dtype=bool))
+
+    def needs_shuffle(self, cards_needed):
+        return ((self.position >= self.cut) |
+                (self.size - self.position < cards_needed))
+
+    def shuffle(self, tables):
+        """
+        Shuffle the shoes of the `tables` (boolean mask)
+        """
+        rows = np.nonzero(tables)[0]
+        if len(rows) == 0:
+            return
+        self.cards[rows, :self.size] = self.rng.permuted(
+            self.cards[rows, :self.size], axis=1)
+        self.cards[rows, self.size:] = self.rng.permuted(
+            self.cards[rows, self.size:], axis=1)
+        self.position[rows] = 0
+        self.shuffles += len(rows)
+
+    def draw(self, tables=None):
+        """
+        Draw one card at each of the `tables` (boolean mask, None for all)
+        Return: (rows, card codes)
+        """
+        if tables is None:
+            rows = slice(None)
+        else:
+            rows = np.nonzero(tables)[0]
+        codes = self.cards[np.arange(len(self.cards))[rows],
+                           self.position[rows]]
+        self.position[rows] += 1
+        return rows, codes
+
+
+def simulate_vectorized(n_rounds, strategies, seed=None, tables=10000,
+                        decks=1, penetration=None):
+    """
+    Play `n_rounds` rounds spread over `tables` tables, one seat at each
+    table for each strategy in `strategies`
+
+    When `n_rounds` isn't a multiple of `tables`, only the first tables
+    count in the last pass, so exactly `n_rounds` rounds are played
+    Return: SimulationResult
+    """
+    for strategy in strategies:
+        if not hasattr(strategy, 'stand_on'):
+            raise TypeError('The vectorized engine only plays'
+                            ' threshold strategies, not %r' % strategy)
+    seats = len(strategies)
+    stand_on = [strategy.stand_on for strategy in strategies]
+    bets = [strategy.bet_value for strategy in strategies]
+    tables = max(1, min(tables, n_rounds))
+    rounds_per_table = -(-n_rounds // tables)
+    # the tables that count in the last pass
+    last = np.arange(tables) < n_rounds - (rounds_per_table - 1) * tables
+
+    result = SimulationResult(seats)
+    start = time.perf_counter()
+
+    shoes = Shoes(tables, decks, penetration, np.random.default_rng(seed))
+    hard = np.zeros((tables, seats), dtype=np.int16)
+    aces = np.zeros((tables, seats), dtype=np.int16)
+    dealer_hard = np.zeros(tables, dtype=np.int16)
+    dealer_aces = np.zeros(tables, dtype=np.int16)
+    wins = np.zeros(seats, dtype=np.int64)
+    losses = np.zeros(seats, dtype=np.int64)
+    cards_needed = (seats + 1) * 5
+
+    def deal(seat, mask=None):
+        rows, codes = shoes.draw(mask)
+        hard[rows, seat] += CARD_VALUES[codes]
+        aces[rows, seat] += CARD_ACES[codes]
+
+    def deal_dealer(mask=None):
+        rows, codes = shoes.draw(mask)
+        dealer_hard[rows] += CARD_VALUES[codes]
+        dealer_aces[rows] += CARD_ACES[codes]
+
+    for i in range(rounds_per_table):
+        shoes.shuffle(shoes.needs_shuffle(cards_needed))
+        hard[:] = 0
+        aces[:] = 0
+        dealer_hard[:] = 0
+        dealer_aces[:] = 0
+
+        # first hand
+        for seat in range(seats):
+            deal(seat)
+        deal_dealer()
+        for seat in range(seats):
+            deal(seat)
+
+        # players' turn
+        for seat in range(seats):
+            while True:
+                hit = hand_sums(hard[:, seat], aces[:, seat]) < stand_on[seat]
+                if not hit.any():
+                    break
+                deal(seat, hit)
+
+        # dealer's turn
+        sums = hand_sums(hard, aces)
+        busted = sums > 21
+        all_busted = busted.all(axis=1)
+        while True:
+            dealer_sum = hand_sums(dealer_hard, dealer_aces)
+            hit = ~all_busted & (dealer_sum <= 17)
+            if not hit.any():
+                break
+            deal_dealer(hit)
+
+        # outcome
+        dealer_sum = dealer_sum[:, None]
+        dealer_busted = dealer_sum > 21
+        won = ~busted & (dealer_busted | (sums > dealer_sum))
+        lost = busted | (~dealer_busted & (sums < dealer_sum))
+        if i == rounds_per_table - 1:
+            won &= last[:, None]
+            lost &= last[:, None]
+        wins += won.sum(axis=0)
+        losses += lost.sum(axis=0)
+
+    rounds = n_rounds
+    for seat in range(seats):
+        draws = rounds - wins[seat] - losses[seat]
+        result.add_hands(seat, int(wins[seat]), int(losses[seat]),
+                         int(draws), int(bets[seat] * (wins[seat] -
+                                                       losses[seat])))
+    result.rounds = rounds
+    result.elapsed = time.perf_counter() - start
+    log.info('%d rounds played, %d shoes shuffled' % (rounds, shoes.shuffles))
+    return result
@@ -0,0 +1,55 @@
+"""
+Check the dealer's bankroll over many rounds: whatever the dealer wins or
+loses in a round is exactly what the players lose or win in it (unless the
+dealer borrowed from the casino in that round). The bets of the busted
+players used to be paid to the dealer again in every following round
+
+Exit code 1 if a round doesn't add up
+"""
+import sys
+
+from blackjack.game import Game
+from blackjack.player import Player
+from blackjack.rng import SeededRandom
+from blackjack.strategy import ThresholdStrategy
+from blackjack.util import headless
+
+ROUNDS = 5000
+SEEDS = (1, 2, 3)
+
+
+def check(seed, errors):
+    players = [Player('seat%d' % seat, '', 0, '', 10 ** 6,
+                      ThresholdStrategy(14 + seat, 10))
+               for seat in range(3)]
+    game = Game(players=players, rng=SeededRandom(seed), seats=3)
+    dealer = game.dealer
+    for i in range(ROUNDS):
+        game.start_round()
+        jetoane = sum(player.jetoane for player in players)
+        dealer_jetoane = dealer.jetoane
+        borrows = dealer.borrows
+        game.run()
+        if dealer.borrows != borrows:
+            continue
+        players_delta = sum(player.jetoane for player in players) - jetoane
+        dealer_delta = dealer.jetoane - dealer_jetoane
+        if dealer_delta != -players_delta:
+            errors.append((seed, game.rounds_played, dealer_delta,
+                           players_delta))
+
+
+def main():
+    errors = []
+    with headless():
+        for seed in SEEDS:
+            check(seed, errors)
+    for seed, round, dealer_delta, players_delta in errors[:20]:
+        print('seed %d, round %d: the dealer got %d, the players %d' %
+              (seed, round, dealer_delta, players_delta))
+    print('%d rounds checked, %d wrong' % (ROUNDS * len(SEEDS), len(errors)))
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,119 @@
+"""
+Check the running hand totals of `IPlayer.draw_card` against the sums of
+the old `get_cards_sum` / `__add_aces` (copied below as they were), on
+every hand a player can hold: the cards are drawn one by one while the
+hand isn't busted. The sums don't depend on the order of the cards, so
+each hand is drawn in one order only (ranks ascending)
+
+Exit code 1 if any hand differs
+"""
+import sys
+
+from blackjack.deck import Deck
+from blackjack.player import IPlayer
+
+
+class OldHand:
+    """
+    The old ace logic, verbatim
+    """
+    def __init__(self, current_hand):
+        self.current_hand = current_hand
+
+    def __add_aces(self, s, aces_in_deck):
+        """
+        Handle the aces in our hand
+            - 1 at most can be added with the value of `11`
+            - the rest, if any, will be added as `1`
+            - if needed the `11` will be turned into a `1`
+
+        Return: integer - the new sum including the aces
+        """
+
+        def can_we_change_ace():
+            """
+            Helper internal method
+            Returns true if we can change an ace from 11 to 1
+            """
+            return s + Deck.ace.value[0] > 21 and added_ace_11 is True
+
+        added_ace_11 = False
+        for i in range(0, aces_in_deck):
+            if s + Deck.ace.value[1] <= 21:
+                # we can safely add the ace as an 11
+                s += Deck.ace.value[1]
+            else:
+                # if we have only one ace add it as a 1
+                if aces_in_deck == 1:
+                    s += Deck.ace.value[0]
+                    added_ace_11 = True
+                else:
+                    # we have more than 1 ace in the deck
+                    # and adding the final as `1` we will go over 21
+                    # one of the previous ones must have been added
+                    # as an `11` so we subtract 10 to turn it into a `1`
+                    if can_we_change_ace() and i > 0:
+                        s -= 10
+                    # add the ace as a `1`
+                    s += Deck.ace.value[0]
+        return s
+
+    def get_cards_sum(self):
+        """
+        Get the sum of all the cards in the player's hand
+        Return: integer - sum of cards
+        """
+        # sum the non-aces first
+        s = sum([Deck.card_values[code] for code in self.current_hand
+                 if not Deck.is_ace(code)])
+        # find the number of aces in the deck
+        aces_in_deck = sum([1 for code in self.current_hand
+                           if Deck.is_ace(code)])
+        # we now have to add `aces_in_deck` aces to
+        # the total sum of the cards
+        s = self.__add_aces(s, aces_in_deck)
+
+        return s
+
+
+def check(hand, errors):
+    """
+    Deal `hand` to a new player and compare with the old sum
+    Return: the player
+    """
+    player = IPlayer('check', 0)
+    for code in hand:
+        player.draw_card(code)
+    expected = OldHand(list(hand)).get_cards_sum()
+    if (player.get_cards_sum() != expected or
+            player.busted != (expected > 21) or
+            player.blackjack != (expected == 21)):
+        errors.append((hand, player.get_cards_sum(), expected))
+    return player
+
+
+def main():
+    # one card code of each rank - the suite doesn't change the sums
+    codes = [rank * len(Deck.card_suites)
+             for rank in range(len(Deck.card_names))]
+    hands = 0
+    errors = []
+    # (hand, index in `codes` of its last card)
+    todo = [((), 0)]
+    while todo:
+        hand, first = todo.pop()
+        for i in range(first, len(codes)):
+            player = check(hand + (codes[i],), errors)
+            hands += 1
+            if not player.busted:
+                todo.append((hand + (codes[i],), i))
+    for hand, got, expected in errors[:20]:
+        print('%s: %d, expected %d' %
+              (' '.join(str(Deck.card(code)) for code in hand),
+               got, expected))
+    print('%d hands checked, %d different' % (hands, len(errors)))
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
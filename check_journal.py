@@ -0,0 +1,62 @@
+"""
+Check the numpy view of a round journal: the array returned by
+`JournalReader.to_numpy` is kept after the reader is closed (closing used
+to fail while the array was alive) and it must still hold the same
+records as `JournalReader.records`
+
+Exit code 1 if the reader can't be closed or a record differs
+"""
+import os
+import sys
+import tempfile
+
+from blackjack.journal import JournalReader
+from blackjack.simulation import simulate
+from blackjack.strategy import ThresholdStrategy
+from blackjack.util import headless
+
+ROUNDS = 2000
+
+
+def check(path, errors):
+    try:
+        with JournalReader(path) as reader:
+            array = reader.to_numpy()
+    except BufferError as e:
+        errors.append('the reader can\'t be closed: %s' % e)
+        return 0
+    # the reader is closed, the array is still alive
+    with JournalReader(path) as reader:
+        records = list(reader.records())
+    if len(array) != len(records):
+        errors.append('%d records in the array, %d in the journal' %
+                      (len(array), len(records)))
+        return len(records)
+    for i, (row, record) in enumerate(zip(array, records)):
+        got = (int(row['round']), int(row['shoe_pos']), int(row['player']),
+               bytes(row['cards'][:row['ncards']]), int(row['hits']),
+               int(row['flags']), int(row['bet']), int(row['delta']),
+               int(row['jetoane']))
+        if got != tuple(record):
+            errors.append('record %d: %r, expected %r' %
+                          (i, got, tuple(record)))
+    return len(records)
+
+
+def main():
+    errors = []
+    with tempfile.TemporaryDirectory() as folder:
+        path = os.path.join(folder, 'journal.bin')
+        with headless():
+            simulate(ROUNDS, [ThresholdStrategy(15, 10),
+                              ThresholdStrategy(17, 3 * 10 ** 9)],
+                     seed=1, bankroll=10 ** 12, decks=2, journal_file=path)
+        records = check(path, errors)
+    for error in errors[:20]:
+        print(error)
+    print('%d records checked, %d errors' % (records, len(errors)))
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,58 @@
+import asyncio
+import argparse
+
+from blackjack import client
+from blackjack.strategy import ThresholdStrategy
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Blackjack client')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8021)
+    parser.add_argument('--unix', default=None, metavar='PATH',
+                        help='connect to this Unix socket instead of TCP')
+    parser.add_argument('--name', default='player')
+    parser.add_argument('--jetoane', type=int, default=100)
+    parser.add_argument('--auto', action='store_true',
+                        help='play automatically instead of asking')
+    parser.add_argument('--stand-on', type=int, default=17,
+                        help='automatic play - hit until the sum reaches this')
+    parser.add_argument('--bet', type=int, default=10,
+                        help='automatic play - flat bet')
+    parser.add_argument('-c', '--clients', type=int, default=1,
+                        help='number of automatic clients (load testing)')
+    parser.add_argument('-n', '--rounds', type=int, default=None,
+                        help='leave after this many rounds')
+    return parser.parse_args()
+
+
+async def run(args):
+    strategy = None
+    if args.auto or args.clients > 1:
+        strategy = ThresholdStrategy(args.stand_on, args.bet)
+
+    async def one_client(number):
+        reader, writer = await client.connect(args.host, args.port,
+                                              args.unix)
+        name = args.name if args.clients == 1 else \
+            '%s%d' % (args.name, number + 1)
+        return await client.play(reader, writer, name, args.jetoane,
+                                 strategy, args.rounds,
+                                 verbose=args.clients == 1)
+
+    results = await asyncio.gather(*[one_client(number)
+                                     for number in range(args.clients)])
+    if args.clients > 1:
+        print(' > %d clients, %d$ left in total' %
+              (len(results), sum(results)))
+
+
+def main():
+    try:
+        asyncio.run(run(parse_args()))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+import os
+import argparse
+
+from blackjack.lobby import Lobby
+from blackjack.strategy import ThresholdStrategy
+
+cwd = os.path.dirname(os.path.realpath(__file__))
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description='Seat all the registered players at as many tables'
+                    ' as needed and play them all at once')
+    parser.add_argument('players_file', nargs='?',
+                        default=os.path.join(cwd, 'assets',
+                                             'ListaParticipanti.txt'),
+                        help='registered players')
+    parser.add_argument('-n', '--rounds', type=int, default=1000,
+                        help='rounds played at each table')
+    parser.add_argument('-s', '--seats', type=int, default=4,
+                        help='seats at each table')
+    parser.add_argument('-t', '--max-tables', type=int, default=None,
+                        help='the other players wait for a free seat')
+    parser.add_argument('-w', '--workers', type=int, default=None,
+                        help='processes, by default one per CPU')
+    parser.add_argument('--stand-on', type=int, default=17,
+                        help='players hit until their sum reaches this')
+    parser.add_argument('--bet', type=int, default=10,
+                        help='flat bet placed by every player')
+    parser.add_argument('--seed', type=int, default=None,
+                        help='seed for the deck shuffling')
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    lobby = Lobby(args.players_file,
+                  ThresholdStrategy(args.stand_on, args.bet),
+                  args.seats, args.max_tables)
+    print(lobby.run(args.rounds, args.seed, args.workers))
+
+
+if __name__ == "__main__":
+    main()
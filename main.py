@@ -1,10 +1,18 @@
 import os
 import logging
+import argparse
 import datetime
 
 from blackjack.deck import Deck
 from blackjack.player import Dealer
 from blackjack.game import Game
+from blackjack.journal import JournalWriter
+from blackjack import checkpoint
+from blackjack.latency import Latency
+from blackjack.metrics import MetricsServer
+from blackjack import pacing
+from blackjack import rng as rngs
+from blackjack.util import log_and_print, start_logging
 
 PLAYERS_FILE = 'ListaParticipanti.txt'
 
@@ -13,37 +21,94 @@ cwd = os.path.dirname(os.path.realpath(__file__))
 players_file = os.path.join(cwd, 'assets', PLAYERS_FILE)
 
 
-def init():
+def init(log_level=logging.DEBUG):
     # set up logging
     now = datetime.datetime.now()
     str_now = now.strftime('%Y%m%d_%H%M%S')
 
     log_file_name = 'blackjack_' + str_now + '.log'
-    log_file = os.path.join(cwd, 'logs', log_file_name)
-    logging.basicConfig(
-            handlers=[logging.FileHandler(log_file, 'w', 'utf-8')],
-            level=logging.DEBUG,
-            format='%(asctime)s | %(levelname)5.5s | %(name)10s | %(message)s')
+    log_dir = os.path.join(cwd, 'logs')
+    os.makedirs(log_dir, exist_ok=True)
+    start_logging(os.path.join(log_dir, log_file_name), log_level)
     # we are going
     log.info('')
     log.info('-' * 80)
     log.info('-- Program started')
 
 
-def log_and_print(msg, log_f=logging.info, end='\n'):
-    log_f(msg)
-    print(msg, end=end)
+def parse_args():
+    parser = argparse.ArgumentParser(description='Blackjack')
+    parser.add_argument('--pace', type=float, default=1.0,
+                        help='speed of the animations: 1 - real time,'
+                             ' 0.5 - twice as fast, 0 - no waiting at all')
+    parser.add_argument('--log-level', default='DEBUG',
+                        choices=['DEBUG', 'INFO', 'WARNING', 'ERROR'],
+                        help='DEBUG logs the deck and the game state'
+                             ' at every round')
+    parser.add_argument('--journal', default=None,
+                        help='record every round in this binary journal')
+    parser.add_argument('--latency', default=None, metavar='JSON',
+                        help='time the phases of the rounds and save the'
+                             ' histograms in this file at exit')
+    parser.add_argument('--metrics-port', type=int, default=None,
+                        help='serve Prometheus metrics on localhost at'
+                             ' this port')
+    parser.add_argument('--checkpoint', default=None, metavar='FILE',
+                        help='save the game in this file and resume it'
+                             ' from there next time')
+    parser.add_argument('--checkpoint-every', type=int, default=1,
+                        help='rounds between two checkpoints')
+    parser.add_argument('--rng', choices=sorted(rngs.BACKENDS), default=None,
+                        help='random number generator of the shuffles'
+                             ' (default: secure, seeded with --seed)')
+    parser.add_argument('--seed', type=int, default=None,
+                        help='seed for the deck shuffling')
+    args = parser.parse_args()
+    if args.rng == 'secure' and args.seed is not None:
+        parser.error('--rng secure can\'t be seeded, drop --seed')
+    return args
+
+
+def set_pace(pace):
+    if pace <= 0:
+        pacing.set_clock(pacing.VirtualClock())
+    elif pace != 1:
+        pacing.set_clock(pacing.ScaledClock(pace))
 
 
 def main():
-    init()
+    args = parse_args()
+    set_pace(args.pace)
+    init(getattr(logging, args.log_level))
+
+    journal = None
+    if args.journal is not None:
+        journal = JournalWriter(args.journal)
 
-    game = Game(players_file)
-    while game.players_in_game() > 0 and game.new_round():
-        game.run()
+    latency = None
+    if args.latency is not None:
+        latency = Latency()
+        latency.dump_at_exit(args.latency)
+
+    try:
+        game = Game(players_file, rng=rngs.make(args.rng, args.seed),
+                    journal=journal, latency=latency)
+        if args.metrics_port is not None:
+            MetricsServer(port=args.metrics_port).start().watch(game)
+        if args.checkpoint is not None and \
+                checkpoint.restore(game, args.checkpoint) is not None:
+            log_and_print(' > Welcome back! Round %d' % game.rounds_played)
+        while game.players_in_game() > 0 and game.new_round():
+            game.run()
+            if (args.checkpoint is not None and
+                    game.rounds_played % args.checkpoint_every == 0):
+                checkpoint.save(game, args.checkpoint)
 
-    if game.players_in_game() == 0:
-        log_and_print('No more players. Game stops!')
+        if game.players_in_game() == 0:
+            log_and_print('No more players. Game stops!')
+    finally:
+        if journal is not None:
+            journal.close()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,53 @@
+import argparse
+
+from blackjack.replay import replay, replay_seed
+from blackjack.strategy import ThresholdStrategy
+from blackjack.rng import BACKENDS
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description='Replay a round journal and audit the payouts')
+    parser.add_argument('journal', help='binary round journal')
+    parser.add_argument('--seed', type=int, default=None,
+                        help='instead of replaying the recorded cards, run'
+                             ' the simulation of this seed again and'
+                             ' compare the journals')
+    parser.add_argument('-s', '--seats', type=int, default=4,
+                        help='seats of the simulation (with --seed)')
+    parser.add_argument('--stand-on', type=int, default=17,
+                        help='strategy of the simulation (with --seed)')
+    parser.add_argument('--bet', type=int, default=10,
+                        help='bet of the simulation (with --seed)')
+    parser.add_argument('--bankroll', type=int, default=1000000,
+                        help='bankroll of the simulation (with --seed)')
+    parser.add_argument('--decks', type=int, default=1,
+                        help='packs in the shoe of the simulation'
+                             ' (with --seed)')
+    parser.add_argument('--penetration', type=float, default=None,
+                        help='penetration of the simulation (with --seed)')
+    parser.add_argument('--pool', action='store_true',
+                        help='the simulation used a shoe pool (with --seed)')
+    parser.add_argument('--rng', choices=sorted(BACKENDS), default='seeded',
+                        help='random number generator of the simulation'
+                             ' (with --seed)')
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    if args.seed is not None:
+        strategies = [ThresholdStrategy(args.stand_on, args.bet)
+                      for i in range(args.seats)]
+        report = replay_seed(args.journal, strategies, args.seed,
+                             bankroll=args.bankroll, decks=args.decks,
+                             penetration=args.penetration,
+                             use_pool=args.pool, backend=args.rng)
+    else:
+        report = replay(args.journal)
+    print(report)
+    return 0 if report.ok() else 1
+
+
+if __name__ == "__main__":
+    exit(main())
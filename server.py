@@ -0,0 +1,71 @@
+import signal
+import asyncio
+import argparse
+
+from blackjack.server import Server, Deadlines
+from blackjack.latency import Latency
+from blackjack.metrics import MetricsServer
+from blackjack.rng import BACKENDS
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Blackjack game server')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8021)
+    parser.add_argument('--unix', default=None, metavar='PATH',
+                        help='serve on this Unix socket instead of TCP')
+    parser.add_argument('-s', '--seats', type=int, default=4,
+                        help='seats at each table')
+    parser.add_argument('--seed', type=int, default=None,
+                        help='seed for the deck shuffling')
+    parser.add_argument('--rng', choices=sorted(BACKENDS), default=None,
+                        help='random number generator of the decks'
+                             ' (default: secure, seeded with --seed)')
+    parser.add_argument('--bet-timeout', type=float, default=30,
+                        help='seconds to place a bet, then the minimum'
+                             ' bet is placed')
+    parser.add_argument('--decision-timeout', type=float, default=30,
+                        help='seconds for each (h)it or (s)tand, then the'
+                             ' player stands')
+    parser.add_argument('--min-bet', type=int, default=1)
+    parser.add_argument('--latency', default=None, metavar='JSON',
+                        help='time the phases of the rounds and save the'
+                             ' histograms in this file at exit')
+    parser.add_argument('--metrics-port', type=int, default=None,
+                        help='serve Prometheus metrics on localhost at'
+                             ' this port')
+    args = parser.parse_args()
+    if args.rng == 'secure' and args.seed is not None:
+        parser.error('--rng secure can\'t be seeded, drop --seed')
+    return args
+
+
+def stop(signum, frame):
+    """
+    `kill` stops the server as Ctrl+C does - the exit handlers still run
+    """
+    raise KeyboardInterrupt
+
+
+def main():
+    args = parse_args()
+    signal.signal(signal.SIGTERM, stop)
+    deadlines = Deadlines(args.bet_timeout, args.decision_timeout,
+                          args.min_bet)
+    latency = None
+    if args.latency is not None:
+        latency = Latency()
+        latency.dump_at_exit(args.latency)
+    metrics = None
+    if args.metrics_port is not None:
+        metrics = MetricsServer(port=args.metrics_port).start()
+    server = Server(args.seats, args.seed, deadlines, latency, metrics,
+                    args.rng)
+    try:
+        asyncio.run(server.serve(args.host, args.port, args.unix))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+import argparse
+
+from blackjack.parallel import simulate_parallel
+from blackjack.simulation import simulate
+from blackjack.strategy import ThresholdStrategy
+from blackjack.basic_strategy import BasicStrategy, BasicStrategyTable
+from blackjack.counting import CardCounter, CountingStrategy, SYSTEMS
+from blackjack.journal import MAX_JETOANE
+from blackjack.latency import Latency
+from blackjack.metrics import MetricsServer
+from blackjack.rng import BACKENDS
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description='Headless blackjack simulation')
+    parser.add_argument('-n', '--rounds', type=int, default=100000,
+                        help='number of rounds to play')
+    parser.add_argument('-s', '--seats', type=int, default=4,
+                        help='number of seats at the table')
+    parser.add_argument('--stand-on', type=int, default=17,
+                        help='players hit until their sum reaches this')
+    parser.add_argument('--basic', action='store_true',
+                        help='play the basic strategy instead (game engine)')
+    parser.add_argument('--count', choices=sorted(SYSTEMS), default=None,
+                        help='count the cards and bet up to --spread times'
+                             ' --bet by the true count (game engine)')
+    parser.add_argument('--spread', type=int, default=8,
+                        help='biggest bet, in --bet units, when counting')
+    parser.add_argument('--bet', type=int, default=10,
+                        help='flat bet placed by every seat')
+    parser.add_argument('--bankroll', type=int, default=1000000,
+                        help='money each seat starts with')
+    parser.add_argument('--decks', type=int, default=1,
+                        help='number of packs in the shoe')
+    parser.add_argument('--penetration', type=float, default=None,
+                        help='fraction of the shoe dealt before reshuffling')
+    parser.add_argument('--pool', action='store_true',
+                        help='shuffle the shoes ahead of time on a thread')
+    parser.add_argument('--engine', choices=['game', 'numpy'],
+                        default='game',
+                        help='game - the regular Game objects,'
+                             ' numpy - many tables vectorized with numpy')
+    parser.add_argument('--tables', type=int, default=10000,
+                        help='tables played in lockstep (numpy engine)')
+    parser.add_argument('-w', '--workers', type=int, default=None,
+                        help='play in parallel on this many processes')
+    parser.add_argument('--shards', type=int, default=16,
+                        help='number of shards for parallel runs')
+    parser.add_argument('--journal', default=None,
+                        help='record every round in this binary journal'
+                             ' (game engine)')
+    parser.add_argument('--ledger', action='store_true',
+                        help='check every round that the money adds up'
+                             ' (game engine)')
+    parser.add_argument('--latency', default=None, metavar='JSON',
+                        help='time the phases of the rounds and save the'
+                             ' histograms in this file (game engine,'
+                             ' not with --workers)')
+    parser.add_argument('--metrics-port', type=int, default=None,
+                        help='serve Prometheus metrics on localhost at'
+                             ' this port (game engine, not with --workers)')
+    parser.add_argument('--checkpoint', default=None, metavar='FILE',
+                        help='save the game in this file as it goes and'
+                             ' resume from it if it exists (game engine)')
+    parser.add_argument('--checkpoint-every', type=int, default=10000,
+                        help='rounds between two checkpoints')
+    parser.add_argument('--seed', type=int, default=None,
+                        help='seed for reproducible runs')
+    parser.add_argument('--rng', choices=sorted(BACKENDS), default=None,
+                        help='random number generator of the shuffles:'
+                             ' seeded - fast (the default), secure - the'
+                             ' OS CSPRNG (no --seed), mt - random.Random'
+                             ' (game engine)')
+    args = parser.parse_args()
+
+    # refuse the options that would be ignored
+    if args.engine == 'numpy':
+        for flag, used in (('--basic', args.basic),
+                           ('--count', args.count is not None),
+                           ('--pool', args.pool),
+                           ('--journal', args.journal is not None),
+                           ('--ledger', args.ledger),
+                           ('--latency', args.latency is not None),
+                           ('--metrics-port', args.metrics_port is not None),
+                           ('--checkpoint', args.checkpoint is not None),
+                           ('--rng', args.rng is not None)):
+            if used:
+                parser.error('%s needs the game engine' % flag)
+    if args.rng == 'secure' and args.seed is not None:
+        parser.error('--rng secure can\'t be seeded, drop --seed')
+    if args.journal is not None and args.bankroll > MAX_JETOANE:
+        parser.error('--bankroll can\'t be over %d with --journal' %
+                     MAX_JETOANE)
+    if args.pool and args.checkpoint is not None:
+        parser.error('--pool can\'t be used with --checkpoint')
+    if args.workers is not None:
+        for flag, used in (('--journal', args.journal is not None),
+                           ('--latency', args.latency is not None),
+                           ('--metrics-port', args.metrics_port is not None),
+                           ('--checkpoint', args.checkpoint is not None)):
+            if used:
+                parser.error('%s can\'t be used with --workers' % flag)
+    if args.rng is None:
+        args.rng = 'seeded'
+    return args
+
+
+def main():
+    args = parse_args()
+    if args.basic:
+        table = BasicStrategyTable()
+        strategies = [BasicStrategy(args.bet, table)
+                      for i in range(args.seats)]
+    else:
+        strategies = [ThresholdStrategy(args.stand_on, args.bet)
+                      for i in range(args.seats)]
+    latency = None
+    if args.latency is not None:
+        latency = Latency()
+        latency.dump_at_exit(args.latency)
+    metrics = None
+    if args.metrics_port is not None:
+        metrics = MetricsServer(port=args.metrics_port).start()
+    counters = ()
+    if args.count is not None:
+        counters = [CardCounter(SYSTEMS[args.count])]
+        strategies = [CountingStrategy(counters[0], strategy, args.bet,
+                                       args.spread)
+                      for strategy in strategies]
+    if args.workers is not None:
+        options = {'decks': args.decks, 'penetration': args.penetration}
+        if args.engine == 'numpy':
+            options['tables'] = args.tables
+        else:
+            options['bankroll'] = args.bankroll
+            options['counters'] = counters
+            options['backend'] = args.rng
+            options['use_pool'] = args.pool
+            options['ledger'] = args.ledger
+        result = simulate_parallel(args.rounds, strategies, seed=args.seed,
+                                   workers=args.workers, shards=args.shards,
+                                   engine=args.engine, **options)
+    elif args.engine == 'numpy':
+        from blackjack.vectorized import simulate_vectorized
+        result = simulate_vectorized(args.rounds, strategies,
+                                     seed=args.seed, tables=args.tables,
+                                     decks=args.decks,
+                                     penetration=args.penetration)
+    else:
+        result = simulate(args.rounds, strategies, seed=args.seed,
+                          bankroll=args.bankroll, decks=args.decks,
+                          penetration=args.penetration, use_pool=args.pool,
+                          journal_file=args.journal, ledger=args.ledger,
+                          counters=counters, latency=latency,
+                          metrics=metrics, checkpoint_file=args.checkpoint,
+                          checkpoint_every=args.checkpoint_every,
+                          backend=args.rng)
+    print(result)
+
+
+if __name__ == "__main__":
+    main()